@@ -0,0 +1,178 @@
+"""
+Admission control.
+
+Each analyzer (audio, video, expression, pdf) runs at most a fixed number of
+requests at once, and at most a fixed number more may wait for a slot.
+Past that the request is rejected straight away with 429 and a Retry-After
+estimated from the queue ahead of it and how long runs have been taking, so
+callers back off instead of piling up work the box can't hold in memory.
+
+Requests that fan out into several analyses (/analyze-segment,
+/analyze-batch) are admitted as a unit: the capacity check happens once, up
+front, for every analyzer they use, and their analyses then wait for slots
+instead of being turned away one by one after the request was accepted.
+Queued async jobs run inside admitted() and always wait for their slots.
+"""
+
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+
+from app.config import config
+from app.executor import pool_size
+from app.timing import record
+
+# Weight of the latest run in the moving average of run time
+EWMA_ALPHA = 0.2
+
+# Set while accepted work fans out (see admit_unit, admitted)
+_admitted_as_unit: ContextVar[bool] = ContextVar("admitted_as_unit", default=False)
+
+
+class AdmissionRejected(HTTPException):
+    """429 raised when an analyzer's wait queue is full."""
+
+    def __init__(self, analyzer: str, waiting: int, retry_after: int):
+        super().__init__(
+            status_code=429,
+            detail=f"{analyzer} analysis is at capacity ({waiting} waiting); retry in {retry_after}s",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class AdmissionLimiter:
+    """Concurrency limit with a bounded wait queue for one analyzer."""
+
+    def __init__(self, name: str, max_concurrent: int, max_waiting: int):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_waiting = max(0, max_waiting)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.active = 0
+        self.waiting = 0
+
+        self.admitted = 0
+        self.rejected = 0
+        self.wait_ms_total = 0.0
+        self.avg_run_s: Optional[float] = None
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free for a request joining the queue now."""
+        run_s = self.avg_run_s if self.avg_run_s is not None else 1.0
+        rounds = (self.waiting + 1) / self.max_concurrent
+        return max(1, math.ceil(rounds * run_s))
+
+    def check(self):
+        """
+        Reject now if a new request would find every slot busy and the wait queue full.
+
+        Raises:
+            AdmissionRejected: With a Retry-After estimate
+        """
+        if self._semaphore is not None and self._semaphore.locked() and self.waiting >= self.max_waiting:
+            self.rejected += 1
+            raise AdmissionRejected(self.name, self.waiting, self.retry_after())
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Hold one of the analyzer's slots for the duration of the block.
+
+        Inside admit_unit() the block always waits for a slot; the request
+        was checked as a whole already.
+
+        Raises:
+            AdmissionRejected: If every slot is busy and the wait queue is full
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        if not _admitted_as_unit.get():
+            self.check()
+
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        started = time.perf_counter()
+        self.admitted += 1
+        self.wait_ms_total += (started - queued_at) * 1000
+        record(f"{self.name}_admission_wait", started - queued_at)
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+            run_s = time.perf_counter() - started
+            self.avg_run_s = run_s if self.avg_run_s is None else (
+                EWMA_ALPHA * run_s + (1 - EWMA_ALPHA) * self.avg_run_s
+            )
+
+    def stats(self) -> Dict[str, float]:
+        """Occupancy, queue depth and wait/run times."""
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_waiting": self.max_waiting,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.wait_ms_total / self.admitted, 1) if self.admitted else 0.0,
+            "avg_run_ms": round(self.avg_run_s * 1000, 1) if self.avg_run_s is not None else None,
+            "retry_after_s": self.retry_after(),
+        }
+
+
+limiters: Dict[str, AdmissionLimiter] = {
+    "audio": AdmissionLimiter("audio", config.AUDIO_MAX_CONCURRENT or pool_size(), config.AUDIO_MAX_QUEUED),
+    "video": AdmissionLimiter("video", config.VIDEO_MAX_CONCURRENT or pool_size(), config.VIDEO_MAX_QUEUED),
+    "expression": AdmissionLimiter(
+        "expression",
+        config.EXPRESSION_MAX_CONCURRENT or config.HUME_STREAM_POOL_SIZE,
+        config.EXPRESSION_MAX_QUEUED,
+    ),
+    "pdf": AdmissionLimiter("pdf", config.PDF_MAX_CONCURRENT, config.PDF_MAX_QUEUED),
+}
+
+
+@contextmanager
+def admitted():
+    """
+    Run work that was already accepted: every analysis inside the block
+    queues for its slot and is never rejected.
+
+    Used for queued async jobs, which the client was told (202) will run.
+    """
+    token = _admitted_as_unit.set(True)
+    try:
+        yield
+    finally:
+        _admitted_as_unit.reset(token)
+
+
+@contextmanager
+def admit_unit(*analyzers: str):
+    """
+    Admit a request that fans out over several analyses as one unit.
+
+    Checks capacity once for each analyzer named (so the whole request gets
+    a single 429 with Retry-After); analyses started inside the block then
+    queue for their slots rather than being rejected. Inside admitted()
+    (a queued job) there is no check: the work waits for slots instead.
+
+    Raises:
+        AdmissionRejected: If any of the analyzers is at capacity
+    """
+    if not _admitted_as_unit.get():
+        for name in dict.fromkeys(analyzers):
+            limiters[name].check()
+    with admitted():
+        yield
@@ -13,6 +13,11 @@ import numpy as np
 from typing import Dict, Any
 import soundfile as sf
 
+from app.timing import stage
+
+# Bump when the metrics this module produces change (invalidates cached results)
+ANALYZER_VERSION = "1"
+
 
 def analyze_audio(audio_path: str) -> Dict[str, Any]:
     """
@@ -25,13 +30,15 @@ def analyze_audio(audio_path: str) -> Dict[str, Any]:
         Dictionary containing risk metrics
     """
     # Load with Parselmouth
-    sound = parselmouth.Sound(audio_path)
+    with stage("audio_decode"):
+        sound = parselmouth.Sound(audio_path)
     
     # Get duration
     duration = sound.get_total_duration()
     
     # Get pitch object
-    pitch = sound.to_pitch()
+    with stage("praat_pitch"):
+        pitch = sound.to_pitch()
     
     # 1. Pitch Standard Deviation (Higher = potential stress)
     try:
@@ -44,15 +51,17 @@ def analyze_audio(audio_path: str) -> Dict[str, Any]:
     # 2. Jitter (Local) - Vocal instability
     # Higher jitter (> 1.0%) often indicates stress or deception
     try:
-        point_process = call(sound, "To PointProcess (periodic, cc)", 75, 500)
-        jitter = call(point_process, "Get jitter (local)", 0, 0, 0.0001, 0.02, 1.3)
+        with stage("praat_jitter"):
+            point_process = call(sound, "To PointProcess (periodic, cc)", 75, 500)
+            jitter = call(point_process, "Get jitter (local)", 0, 0, 0.0001, 0.02, 1.3)
         jitter_percent = jitter * 100 if not np.isnan(jitter) else 0.0
     except Exception:
         jitter_percent = 0.0
     
     # 3. Shimmer (amplitude variation) - Voice tremor
     try:
-        shimmer = call([sound, point_process], "Get shimmer (local)", 0, 0, 0.0001, 0.02, 1.3, 1.6)
+        with stage("praat_shimmer"):
+            shimmer = call([sound, point_process], "Get shimmer (local)", 0, 0, 0.0001, 0.02, 1.3, 1.6)
         shimmer_percent = shimmer * 100 if not np.isnan(shimmer) else 0.0
     except Exception:
         shimmer_percent = 0.0
@@ -67,8 +76,9 @@ def analyze_audio(audio_path: str) -> Dict[str, Any]:
     
     # 5. Harmonics-to-Noise Ratio (voice quality)
     try:
-        harmonicity = sound.to_harmonicity()
-        hnr = call(harmonicity, "Get mean", 0, 0)
+        with stage("praat_hnr"):
+            harmonicity = sound.to_harmonicity()
+            hnr = call(harmonicity, "Get mean", 0, 0)
         if np.isnan(hnr):
             hnr = 0.0
     except Exception:
@@ -78,8 +88,9 @@ def analyze_audio(audio_path: str) -> Dict[str, Any]:
     # If the audio is too quiet or too noisy (low HNR), results are unreliable.
     # In a quiet room, mic static can cause high Jitter/Shimmer if undetected.
     try:
-        intensity = sound.to_intensity()
-        mean_intensity = call(intensity, "Get mean", 0, 0)
+        with stage("praat_intensity"):
+            intensity = sound.to_intensity()
+            mean_intensity = call(intensity, "Get mean", 0, 0)
     except Exception:
         mean_intensity = 0.0
 
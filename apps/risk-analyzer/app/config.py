@@ -4,6 +4,7 @@ Loads environment variables and provides configuration access.
 """
 
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -15,20 +16,104 @@ class Config:
     
     # HumeAI Configuration
     HUME_API_KEY: str = os.getenv("HUME_API_KEY", "")
+    # Empty = Hume's API; point at a stand-in (bench.fake_hume) for offline load tests
+    HUME_BASE_URL: str = os.getenv("HUME_BASE_URL", "")
     
     # Analysis timeouts (seconds)
     HUME_JOB_TIMEOUT: int = int(os.getenv("HUME_JOB_TIMEOUT", "120"))
+    # First batch job status check (s); later checks back off to 8 s
     HUME_POLL_INTERVAL: int = int(os.getenv("HUME_POLL_INTERVAL", "2"))
+
+    # Batch API: files arriving within the window share one inference job
+    HUME_BATCH_WINDOW_MS: int = int(os.getenv("HUME_BATCH_WINDOW_MS", "250"))
+    HUME_BATCH_MAX_FILES: int = int(os.getenv("HUME_BATCH_MAX_FILES", "20"))
+
+    # Max concurrent Hume stream websockets (opened on demand)
+    HUME_STREAM_POOL_SIZE: int = int(os.getenv("HUME_STREAM_POOL_SIZE", "4"))
+    # Longer videos are sent as chunks of this many seconds in parallel (0 = never split)
+    HUME_STREAM_CHUNK_SECONDS: float = float(os.getenv("HUME_STREAM_CHUNK_SECONDS", "30"))
     
     # Risk thresholds
     HIGH_RISK_EMOTION_THRESHOLD: float = float(os.getenv("HIGH_RISK_EMOTION_THRESHOLD", "0.7"))
     MEDIUM_RISK_EMOTION_THRESHOLD: float = float(os.getenv("MEDIUM_RISK_EMOTION_THRESHOLD", "0.4"))
 
+    # Analyzer worker pool (Parselmouth / MediaPipe run here, off the event loop)
+    # 0 workers = one per CPU core.
+    ANALYZER_POOL_WORKERS: int = int(os.getenv("ANALYZER_POOL_WORKERS", "0"))
+    ANALYZER_MAX_TASKS_PER_CHILD: int = int(os.getenv("ANALYZER_MAX_TASKS_PER_CHILD", "200"))
+
+    # Video frames analyzed per second of video time (0 = every frame)
+    VIDEO_SAMPLE_RATE_HZ: float = float(os.getenv("VIDEO_SAMPLE_RATE_HZ", "10"))
+
+    # ffprobe (container metadata without decoding) / ffmpeg (audio extraction)
+    FFPROBE_PATH: str = os.getenv("FFPROBE_PATH", "ffprobe")
+    FFPROBE_TIMEOUT: float = float(os.getenv("FFPROBE_TIMEOUT", "10"))
+    FFMPEG_PATH: str = os.getenv("FFMPEG_PATH", "ffmpeg")
+    FFMPEG_TIMEOUT: float = float(os.getenv("FFMPEG_TIMEOUT", "60"))
+
+    # Upload spooling
+    # Where uploads are spooled for the analyzers, e.g. a tmpfs mount; empty = system temp.
+    # The multipart parser's own spill file still goes to the system temp dir (TMPDIR).
+    SCRATCH_DIR: str = os.getenv("SCRATCH_DIR", "")
+    UPLOAD_CHUNK_SIZE: int = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+    MAX_UPLOAD_BYTES: int = int(os.getenv("MAX_UPLOAD_BYTES", str(512 * 1024 * 1024)))  # 0 = unlimited
+
+    # /analyze-batch
+    BATCH_MAX_SEGMENTS: int = int(os.getenv("BATCH_MAX_SEGMENTS", "64"))
+
+    # Admission control: concurrent runs per analyzer (0 = analyzer pool size;
+    # for expression, HUME_STREAM_POOL_SIZE) and how many more requests may
+    # wait for a slot before the rest get 429 with Retry-After.
+    AUDIO_MAX_CONCURRENT: int = int(os.getenv("AUDIO_MAX_CONCURRENT", "0"))
+    AUDIO_MAX_QUEUED: int = int(os.getenv("AUDIO_MAX_QUEUED", "32"))
+    VIDEO_MAX_CONCURRENT: int = int(os.getenv("VIDEO_MAX_CONCURRENT", "0"))
+    VIDEO_MAX_QUEUED: int = int(os.getenv("VIDEO_MAX_QUEUED", "32"))
+    EXPRESSION_MAX_CONCURRENT: int = int(os.getenv("EXPRESSION_MAX_CONCURRENT", "0"))
+    EXPRESSION_MAX_QUEUED: int = int(os.getenv("EXPRESSION_MAX_QUEUED", "32"))
+    PDF_MAX_CONCURRENT: int = int(os.getenv("PDF_MAX_CONCURRENT", "2"))
+    PDF_MAX_QUEUED: int = int(os.getenv("PDF_MAX_QUEUED", "16"))
+
+    # Async job API (POST /jobs/{type}): waiting jobs beyond JOB_QUEUE_SIZE are
+    # rejected; finished jobs are kept for JOB_RESULT_TTL seconds.
+    JOB_QUEUE_SIZE: int = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "4"))
+    JOB_RESULT_TTL: float = float(os.getenv("JOB_RESULT_TTL", "3600"))
+    # Where callbackUrl may point: comma-separated hosts ("hooks.internal",
+    # "svc:8080") or base URLs ("https://svc/hooks/"). Empty = callbacks refused.
+    JOB_CALLBACK_ALLOWED_HOSTS: str = os.getenv("JOB_CALLBACK_ALLOWED_HOSTS", "")
+
+    # ?profile=true: where analyzer cProfile dumps go (empty = timing breakdown only)
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", "")
+
+    # Analyzer result cache (content hash + params + analyzer version).
+    # Empty RESULT_CACHE_DIR = memory tier only.
+    RESULT_CACHE_ENABLED: bool = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+    RESULT_CACHE_MEMORY_ENTRIES: int = int(os.getenv("RESULT_CACHE_MEMORY_ENTRIES", "512"))
+    RESULT_CACHE_DIR: str = os.getenv(
+        "RESULT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "risk-analyzer-cache")
+    )
+    RESULT_CACHE_DISK_MAX_BYTES: int = int(os.getenv("RESULT_CACHE_DISK_MAX_BYTES", str(256 * 1024 * 1024)))
     
     # Supabase Configuration
     SUPABASE_URL: str = os.getenv("SUPABASE_URL", "")
     SUPABASE_SERVICE_ROLE_KEY: str = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
     SUPABASE_BUCKET_NAME: str = os.getenv("SUPABASE_BUCKET_NAME", "risk_analysis")
+    # Files above the threshold use resumable (TUS) uploads. Supabase expects
+    # 6 MiB chunks; only a failed chunk is retried.
+    STORAGE_RESUMABLE_THRESHOLD: int = int(os.getenv("STORAGE_RESUMABLE_THRESHOLD", str(6 * 1024 * 1024)))
+    STORAGE_CHUNK_SIZE: int = int(os.getenv("STORAGE_CHUNK_SIZE", str(6 * 1024 * 1024)))
+    STORAGE_CHUNK_RETRIES: int = int(os.getenv("STORAGE_CHUNK_RETRIES", "3"))
+    # Signed URLs are reused for this fraction of their lifetime (0 entries = no caching)
+    SIGNED_URL_CACHE_ENTRIES: int = int(os.getenv("SIGNED_URL_CACHE_ENTRIES", "1024"))
+    SIGNED_URL_CACHE_TTL_FRACTION: float = float(os.getenv("SIGNED_URL_CACHE_TTL_FRACTION", "0.5"))
+
+    # Shared outbound HTTP client (storage uploads, URL signing).
+    # HTTP/2 needs h2 (httpx[http2] in requirements.txt); HTTP/1.1 without it.
+    HTTP_TIMEOUT: float = float(os.getenv("HTTP_TIMEOUT", "30"))
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+    HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+    HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
     
     @classmethod
     def validate(cls):
@@ -0,0 +1,149 @@
+"""
+Analyzer Worker Pool.
+
+Parselmouth and MediaPipe are CPU-bound and hold the GIL for the whole
+analysis, so calling them from an `async def` endpoint stalls the event loop
+(and /health with it) until they return. All analyzer work is submitted to a
+process pool instead; the event loop only handles request I/O.
+
+Workers are started with the 'spawn' method: MediaPipe graphs and OpenCV
+threads do not survive a fork, and max_tasks_per_child requires it anyway.
+
+Workers are recycled every ANALYZER_MAX_TASKS_PER_CHILD tasks to cap native
+memory growth. Python 3.11+ does this per worker (max_tasks_per_child); on
+3.10 the whole pool is retired once it has taken that many tasks per worker,
+and the next call starts a fresh one while the old workers finish theirs.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app import stats, timing
+from app.config import config
+from app.profiling import profile_path_for, run_profiled
+
+_executor: Optional[ProcessPoolExecutor] = None
+# Tasks submitted to _executor (only counted where the pool can't recycle workers itself)
+_submitted = 0
+_RECYCLES_PER_CHILD = sys.version_info >= (3, 11)
+
+
+def _init_worker():
+    """Warm per-process analyzer state so the first request doesn't pay for it."""
+    from app.video_analyzer import face_mesh_pool
+    face_mesh_pool.warm()
+
+
+def _call_timed(
+    fn: Callable[..., Any], profile_path: Optional[str], *args: Any
+) -> Tuple[Any, Dict[str, float]]:
+    """Worker-side wrapper: run fn (under cProfile if asked) and return the stage timings it recorded."""
+    with timing.collect() as stages, timing.stage("pool_run"):
+        if profile_path:
+            result = run_profiled(profile_path, fn, *args)
+        else:
+            result = fn(*args)
+    return result, stages
+
+
+def pool_size() -> int:
+    """Analyzer worker count (ANALYZER_POOL_WORKERS, 0 = one per CPU core)."""
+    workers = config.ANALYZER_POOL_WORKERS
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def start_pool() -> ProcessPoolExecutor:
+    """Create the analyzer pool (idempotent)."""
+    global _executor, _submitted
+    if _executor is None:
+        max_tasks = config.ANALYZER_MAX_TASKS_PER_CHILD
+        kwargs = {}
+        if _RECYCLES_PER_CHILD and max_tasks > 0:
+            kwargs["max_tasks_per_child"] = max_tasks
+        _executor = ProcessPoolExecutor(
+            max_workers=pool_size(),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            **kwargs,
+        )
+        _submitted = 0
+        print(f"[AnalyzerPool] Started {pool_size()} workers (max_tasks_per_child={max_tasks or 'unlimited'})")
+    return _executor
+
+
+def shutdown_pool():
+    """Stop the analyzer pool, cancelling work that has not started yet."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+        print("[AnalyzerPool] Shut down")
+
+
+def _count_task(executor: ProcessPoolExecutor):
+    """Python 3.10: retire the pool once it has run max_tasks_per_child tasks per worker."""
+    global _executor, _submitted
+    max_tasks = config.ANALYZER_MAX_TASKS_PER_CHILD
+    if _RECYCLES_PER_CHILD or max_tasks <= 0 or _executor is not executor:
+        return
+    _submitted += 1
+    if _submitted >= max_tasks * pool_size():
+        _executor = None
+        # Work already submitted still runs; the workers exit once it's done
+        executor.shutdown(wait=False)
+        stats.incr("analyzer_pool_recycles")
+        print(f"[AnalyzerPool] Recycling the pool after {_submitted} tasks")
+
+
+def _discard_broken(executor: ProcessPoolExecutor):
+    """Drop a pool that lost a worker so the next submit starts a fresh one."""
+    global _executor
+    if _executor is executor:
+        _executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+        stats.incr("analyzer_pool_restarts")
+        print("[AnalyzerPool] A worker died abruptly; discarded the pool")
+
+
+async def run_in_pool(fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run a picklable, module-level function in the analyzer pool.
+
+    Args:
+        fn: Analyzer entry point (e.g. analyze_audio, analyze_video)
+        *args: Positional arguments; must be picklable (paths, not file objects)
+
+    Returns:
+        Whatever fn returns; stages it timed are recorded in this process,
+        along with pool_queue (time spent waiting for a free worker)
+
+    Raises:
+        BrokenProcessPool: If the call's worker died again after one retry on
+            a fresh pool (a segfault or OOM kill breaks every call in flight,
+            not just the one that caused it)
+    """
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    profile_path = profile_path_for(fn)
+    for attempt in range(2):
+        executor = start_pool()
+        try:
+            future = loop.run_in_executor(executor, _call_timed, fn, profile_path, *args)
+            _count_task(executor)
+            result, stages = await future
+            break
+        except BrokenProcessPool:
+            _discard_broken(executor)
+            if attempt:
+                raise
+    timing.record("pool_queue", max(0.0, time.perf_counter() - start - stages.get("pool_run", 0.0)))
+    timing.replay(stages)
+    return result
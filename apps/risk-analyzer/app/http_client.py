@@ -0,0 +1,79 @@
+"""
+Shared HTTP Client.
+
+Storage uploads and URL signing used to open a new httpx.AsyncClient per
+call, paying a TCP + TLS handshake every time. One process-wide client is
+created on startup and closed on shutdown instead, so connections to
+Supabase are kept alive and reused. HTTP/2 is negotiated through h2
+(installed with httpx[http2]; without it the client falls back to
+HTTP/1.1), multiplexing uploads over one connection.
+"""
+
+import importlib.util
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.config import config
+
+_client: Optional[httpx.AsyncClient] = None
+_requests = 0
+
+
+async def _count_request(request: httpx.Request):
+    global _requests
+    _requests += 1
+
+
+def _http2_available() -> bool:
+    return config.HTTP2_ENABLED and importlib.util.find_spec("h2") is not None
+
+
+def start_http_client() -> httpx.AsyncClient:
+    """Create the shared client (idempotent)."""
+    global _client
+    if _client is None or _client.is_closed:
+        http2 = _http2_available()
+        _client = httpx.AsyncClient(
+            http2=http2,
+            timeout=config.HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=config.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+            ),
+            event_hooks={"request": [_count_request]},
+        )
+        print(f"[HttpClient] Started (max_connections={config.HTTP_MAX_CONNECTIONS}, http2={http2})")
+    return _client
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """The shared client; started on first use if startup didn't run (e.g. scripts)."""
+    return start_http_client()
+
+
+async def close_http_client():
+    """Close the shared client and its pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        print("[HttpClient] Closed")
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Connection pool occupancy and request count."""
+    stats: Dict[str, Any] = {"requests": _requests}
+    # httpx doesn't expose its pool; read httpcore's when it's there
+    pool = getattr(getattr(_client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", None) or [])
+    idle = sum(1 for c in connections if c.is_idle())
+    stats.update({
+        "connections": len(connections),
+        "idle": idle,
+        "active": len(connections) - idle,
+        "http2": sum(1 for c in connections if "HTTP/2" in c.info()),
+        "max_connections": config.HTTP_MAX_CONNECTIONS,
+    })
+    return stats
@@ -10,6 +10,7 @@ Uses async job pattern: submit → poll → extract results
 """
 
 import asyncio
+import tempfile
 from datetime import datetime
 from typing import Dict, Any, List, Tuple
 from hume import AsyncHumeClient
@@ -17,6 +18,13 @@ from hume.expression_measurement.batch.types import UnionPredictResult
 from hume.expression_measurement.stream import Config as StreamConfig
 
 from app.config import config
+from app.hume_jobs import HumeBatchSubmitter, HumeJobPoller
+from app.hume_pool import HumeSocketPool
+from app.media import probe_media, split_media
+from app.uploads import scratch_dir
+
+# Bump when the metrics this module produces change (invalidates cached results)
+ANALYZER_VERSION = "1"
 
 
 class HumeAnalyzer:
@@ -29,28 +37,32 @@ class HumeAnalyzer:
 
         self.api_key = config.HUME_API_KEY
         self.timeout = config.HUME_JOB_TIMEOUT
-        self.poll_interval = config.HUME_POLL_INTERVAL
-
-        self.socket = None
-        self.client = AsyncHumeClient(api_key=self.api_key)
-        # Serialize access to the shared stream socket. Hume's stream API permits
-        # only one in-flight recv per connection, so concurrent send_file() calls
-        # collide with "cannot call recv while another coroutine is already
-        # waiting for the next message".
-        self._socket_lock = asyncio.Lock()
+
+        self.client = AsyncHumeClient(api_key=self.api_key, base_url=config.HUME_BASE_URL or None)
+        # Hume's stream API permits only one in-flight recv per connection, so
+        # each request checks out a socket of its own from a bounded pool.
+        self.socket_pool = HumeSocketPool(self.client, config.HUME_STREAM_POOL_SIZE)
+        # Batch jobs share one background poller instead of a loop each
+        self.job_poller = HumeJobPoller(
+            self.client, timeout=self.timeout, min_interval=config.HUME_POLL_INTERVAL
+        )
+        # ...and files arriving close together share one batch job
+        self.batch_submitter = HumeBatchSubmitter(
+            self.client,
+            self.job_poller,
+            window_s=config.HUME_BATCH_WINDOW_MS / 1000,
+            max_files=config.HUME_BATCH_MAX_FILES,
+        )
     
     async def _connect(self):
-        if self.client and not self.socket:
-            self._ctx = self.client.expression_measurement.stream.connect()
-            self.socket = await self._ctx.__aenter__()
-            print("[HumeAnalyzer] Connected to HumeAI")
+        await self.socket_pool.warm()
+        print(f"[HumeAnalyzer] Connected to HumeAI (stream pool size {self.socket_pool.max_size})")
 
     async def _disconnect(self):
-        if self._ctx:
-            await self._ctx.__aexit__(None, None, None)
-            self._ctx = None
-            self.socket = None
-            print("[HumeAnalyzer] Disconnected from HumeAI")
+        await self.batch_submitter.close()
+        await self.job_poller.close()
+        await self.socket_pool.close()
+        print("[HumeAnalyzer] Disconnected from HumeAI")
     
     async def analyze_audio(self, audio_path: str) -> Dict[str, Any]:
         """
@@ -58,8 +70,7 @@ class HumeAnalyzer:
         """
         try:
             model_config = StreamConfig(prosody={})
-            async with self._socket_lock:
-                result = await self.socket.send_file(audio_path, config=model_config)
+            result = await self.socket_pool.send_file(audio_path, model_config)
             results_list = result if isinstance(result, list) else [result]
             metrics = self._extract_from_stream_results(results_list, "prosody")
             return metrics
@@ -72,18 +83,97 @@ class HumeAnalyzer:
         """
         Analyze video file for facial expressions and emotions using Stream API.
         Attempts both face and prosody analysis. Falls back to face only if audio is missing.
+
+        Videos longer than HUME_STREAM_CHUNK_SECONDS are cut into chunks that
+        are sent in parallel over the socket pool. Predictions from all chunks
+        are pooled before aggregation, so emotion averages and frame counts
+        come out the same as a single send_file over the whole file.
         """
-        try:
-            print(f"[HumeAnalyzer] Analyzing video: {video_path} (has_audio={has_audio})")
+        print(f"[HumeAnalyzer] Analyzing video: {video_path} (has_audio={has_audio})")
+        with tempfile.TemporaryDirectory(dir=scratch_dir()) as chunk_dir:
+            chunks = await self._split_video(video_path, chunk_dir)
+            tasks = [asyncio.ensure_future(self._send_video(chunk, has_audio)) for chunk in chunks]
+            try:
+                outcomes = await asyncio.gather(*tasks)
+            except BaseException:
+                # Don't leave sibling chunks reading files we're about to delete
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+
+        results_list = [res for results, _ in outcomes for res in results]
+        metrics = self._extract_from_stream_results(results_list, "face")
+        if any(face_only for _, face_only in outcomes):
+            metrics["details"] = "Video analysis limited to facial expressions (no audio detected)."
+        return metrics
+
+    async def analyze_video_batch(self, video_url: str, has_audio: bool = True) -> Dict[str, Any]:
+        """
+        Analyze a video by URL with the Batch API instead of a stream socket.
+
+        The file shares a batch job with others submitted around the same
+        time (see HumeBatchSubmitter), which suits queued work that can wait
+        for the job rather than hold a socket. Metrics have the same shape as
+        analyze_video's.
+
+        Args:
+            video_url: Publicly fetchable (e.g. signed) URL of the video
+            has_audio: Also run prosody on the audio track
+        """
+        models = ("face", "prosody") if has_audio else ("face",)
+        predictions = await self.batch_submitter.predict(video_url, models)
+        metrics = self._extract_from_stream_results(self._batch_to_stream_results(predictions), "face")
+        metrics["provider"] = "HumeAI-Batch-Face"
+        return metrics
+
+    @staticmethod
+    def _batch_to_stream_results(predictions: List[UnionPredictResult]) -> List[Dict[str, Any]]:
+        """Flatten batch predictions into stream-shaped results ({model: {"predictions": [...]}})."""
+        results = []
+        for file_prediction in predictions:
+            file_results = getattr(file_prediction, 'results', None)
+            for prediction in getattr(file_results, 'predictions', None) or []:
+                models = {}
+                for model_name in ["face", "prosody"]:
+                    model_data = getattr(prediction.models, model_name, None)
+                    if model_data:
+                        models[model_name] = {
+                            "predictions": [p for group in model_data.grouped_predictions for p in group.predictions]
+                        }
+                results.append(models)
+        return results
+
+    async def _split_video(self, video_path: str, chunk_dir: str) -> List[str]:
+        """Chunk paths for a video, or just the video itself if it is short enough."""
+        chunk_seconds = config.HUME_STREAM_CHUNK_SECONDS
+        if chunk_seconds <= 0:
+            return [video_path]
+        probe = await asyncio.to_thread(probe_media, video_path)
+        duration = probe["duration_s"] if probe else 0.0
+        if duration <= chunk_seconds:
+            return [video_path]
+        chunks = await split_media(video_path, chunk_seconds, chunk_dir)
+        if len(chunks) < 2:  # ffmpeg failed, or no keyframe to cut on
+            return [video_path]
+        print(f"[HumeAnalyzer] Split {duration:.1f}s video into {len(chunks)} chunks")
+        return chunks
+
+    async def _send_video(self, video_path: str, has_audio: bool) -> Tuple[List[Any], bool]:
+        """
+        Send one video (or chunk) over the stream API.
 
+        Returns:
+            Tuple of (stream results, True if the face-only fallback was used)
+        """
+        try:
             # Choose config based on audio presence
             if has_audio:
                 model_config = StreamConfig(face={}, prosody={})
             else:
                 model_config = StreamConfig(face={})
 
-            async with self._socket_lock:
-                result = await self.socket.send_file(video_path, config=model_config)
+            result = await self.socket_pool.send_file(video_path, model_config)
             
             # Check if any part of the result contains the 'video_no_audio' error
             results_list = result if isinstance(result, list) else [result]
@@ -101,15 +191,11 @@ class HumeAnalyzer:
             if has_prosody_error:
                 print(f"[HumeAnalyzer] Video has no audio (detected in response), retrying with face only...")
                 face_only_config = StreamConfig(face={})
-                async with self._socket_lock:
-                    result = await self.socket.send_file(video_path, config=face_only_config)
+                result = await self.socket_pool.send_file(video_path, face_only_config)
                 results_list = result if isinstance(result, list) else [result]
-                metrics = self._extract_from_stream_results(results_list, "face")
-                metrics["details"] = "Video analysis limited to facial expressions (no audio detected)."
-                return metrics
+                return results_list, True
 
-            metrics = self._extract_from_stream_results(results_list, "face")
-            return metrics
+            return results_list, False
             
         except Exception as e:
             error_msg = str(e)
@@ -119,12 +205,9 @@ class HumeAnalyzer:
                 try:
                     # Retry with only face model
                     face_only_config = StreamConfig(face={})
-                    async with self._socket_lock:
-                        result = await self.socket.send_file(video_path, config=face_only_config)
+                    result = await self.socket_pool.send_file(video_path, face_only_config)
                     results_list = result if isinstance(result, list) else [result]
-                    metrics = self._extract_from_stream_results(results_list, "face")
-                    metrics["details"] = "Video analysis limited to facial expressions (no audio detected)."
-                    return metrics
+                    return results_list, True
                 except Exception as retry_e:
                     print(f"[HumeAnalyzer] Video face-only fallback failed: {retry_e}")
                     raise
@@ -158,47 +241,6 @@ class HumeAnalyzer:
         
         return combined
     
-    async def _poll_until_complete(self, client: AsyncHumeClient, job_id: str):
-        """
-        Poll job status until completion or timeout.
-        
-        Args:
-            client: HumeAI client instance
-            job_id: Job ID to poll
-        
-        Raises:
-            TimeoutError: If job doesn't complete within timeout
-            RuntimeError: If job fails
-        """
-        try:
-            await asyncio.wait_for(
-                self._poll_loop(client, job_id),
-                timeout=self.timeout
-            )
-        except asyncio.TimeoutError:
-            raise TimeoutError(f"HumeAI job {job_id} timed out after {self.timeout}s")
-    
-    async def _poll_loop(self, client: AsyncHumeClient, job_id: str):
-        """Internal polling loop."""
-        delay = 1  # Start with 1 second
-        
-        while True:
-            await asyncio.sleep(delay)
-            
-            details = await client.expression_measurement.batch.get_job_details(job_id)
-            status = details.state.status
-            
-            print(f"[HumeAnalyzer] Job {job_id} status: {status}")
-            
-            if status == "COMPLETED":
-                return
-            elif status == "FAILED":
-                error_msg = details.state.message if hasattr(details.state, 'message') else "Unknown error"
-                raise RuntimeError(f"HumeAI job failed: {error_msg}")
-            
-            # Exponential backoff, max 8 seconds
-            delay = min(delay * 1.5, 8)
-    
     def _extract_from_stream_results(self, results: List[Any], primary_model: str) -> Dict[str, Any]:
         """Generic extraction for Stream API results."""
         all_emotions = {}
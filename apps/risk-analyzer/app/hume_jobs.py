@@ -0,0 +1,310 @@
+"""
+Hume Batch Jobs: shared poller and multi-file submission.
+
+Batch inference jobs finish asynchronously, so someone has to ask Hume
+whether they are done. Rather than one polling loop per job, a single
+background task tracks every outstanding job ID, checks the ones that are
+due in one sweep, and resolves a future per job. Each job backs off on its
+own schedule (quickly at first, slower the longer it runs), and the sweep
+sleeps until the earliest job is due again.
+
+The batch API also takes many URLs per job, so files that arrive close
+together are submitted as one job and the predictions are split back out
+per file by source URL.
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from hume import AsyncHumeClient
+from hume.expression_measurement.batch import Face, Models, Prosody
+from hume.expression_measurement.batch.types import UnionPredictResult
+
+from app.timing import stage
+
+# Batch model configs by name
+BATCH_MODELS = {"face": Face, "prosody": Prosody}
+
+
+class _PendingJob:
+    __slots__ = ("future", "deadline", "delay", "next_check")
+
+    def __init__(self, future: asyncio.Future, deadline: float, delay: float, next_check: float):
+        self.future = future
+        self.deadline = deadline
+        self.delay = delay
+        self.next_check = next_check
+
+
+class HumeJobPoller:
+    """Shared poller for outstanding Hume batch jobs."""
+
+    def __init__(
+        self,
+        client: AsyncHumeClient,
+        timeout: float,
+        min_interval: float = 1.0,
+        max_interval: float = 8.0,
+        backoff: float = 1.5,
+    ):
+        self.client = client
+        self.timeout = timeout
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.backoff = backoff
+
+        self._jobs: Dict[str, _PendingJob] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+        self.polls = 0
+        self.sweeps = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+
+    async def wait(self, job_id: str):
+        """
+        Wait for a batch job to finish.
+
+        Args:
+            job_id: ID returned by start_inference_job
+
+        Raises:
+            TimeoutError: If the job doesn't complete within the poller timeout
+            RuntimeError: If the job fails
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            job = _PendingJob(
+                future=loop.create_future(),
+                deadline=now + self.timeout,
+                delay=self.min_interval,
+                next_check=now + self.min_interval,
+            )
+            self._jobs[job_id] = job
+            self._ensure_running()
+        # Shielded: one waiter giving up must not cancel the job for others
+        await asyncio.shield(job.future)
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        else:
+            self._wakeup.set()
+
+    def _finish(self, job_id: str, error: Optional[BaseException] = None):
+        job = self._jobs.pop(job_id, None)
+        if job is None or job.future.done():
+            return
+        if error is None:
+            job.future.set_result(None)
+        else:
+            job.future.set_exception(error)
+            job.future.exception()  # retrieved, even if every waiter went away
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while self._jobs:
+            now = loop.time()
+            due = [(job_id, job) for job_id, job in self._jobs.items() if job.next_check <= now]
+            if due:
+                self.sweeps += 1
+                await asyncio.gather(*(self._check(job_id, job) for job_id, job in due))
+
+            now = loop.time()
+            for job_id, job in list(self._jobs.items()):
+                if job.deadline <= now:
+                    self.timed_out += 1
+                    self._finish(job_id, TimeoutError(f"HumeAI job {job_id} timed out after {self.timeout}s"))
+            if not self._jobs:
+                break
+
+            wake_at = min(min(job.next_check, job.deadline) for job in self._jobs.values())
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, wake_at - now))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _check(self, job_id: str, job: _PendingJob):
+        loop = asyncio.get_running_loop()
+        try:
+            details = await self.client.expression_measurement.batch.get_job_details(job_id)
+        except Exception as e:
+            # Transient API errors (429s included) just push the next check out
+            print(f"[HumeJobPoller] Status check for {job_id} failed: {e}")
+            job.delay = min(job.delay * 2, self.max_interval)
+            job.next_check = loop.time() + job.delay
+            return
+
+        self.polls += 1
+        status = details.state.status
+        print(f"[HumeJobPoller] Job {job_id} status: {status}")
+
+        if status == "COMPLETED":
+            self.completed += 1
+            self._finish(job_id)
+        elif status == "FAILED":
+            self.failed += 1
+            error_msg = getattr(details.state, "message", None) or "Unknown error"
+            self._finish(job_id, RuntimeError(f"HumeAI job failed: {error_msg}"))
+        else:
+            job.delay = min(job.delay * self.backoff, self.max_interval)
+            job.next_check = loop.time() + job.delay
+
+    async def close(self):
+        """Stop polling; anything still waiting gets a RuntimeError."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for job_id in list(self._jobs):
+            self._finish(job_id, RuntimeError("Hume job poller stopped"))
+
+    def stats(self) -> Dict[str, int]:
+        """Outstanding jobs and poll totals."""
+        return {
+            "outstanding": len(self._jobs),
+            "sweeps": self.sweeps,
+            "polls": self.polls,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+        }
+
+
+class _OpenBatch:
+    __slots__ = ("futures", "timer")
+
+    def __init__(self):
+        self.futures: Dict[str, asyncio.Future] = {}  # url -> predictions for that file
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class HumeBatchSubmitter:
+    """Groups files into shared batch inference jobs."""
+
+    def __init__(self, client: AsyncHumeClient, poller: HumeJobPoller, window_s: float, max_files: int):
+        self.client = client
+        self.poller = poller
+        self.window_s = window_s
+        self.max_files = max(1, max_files)
+
+        self._open: Dict[Tuple[str, ...], _OpenBatch] = {}
+        self._running: set = set()
+
+        self.jobs = 0
+        self.files = 0
+
+    async def predict(self, url: str, models: Sequence[str]) -> List[UnionPredictResult]:
+        """
+        Run batch inference for one file, sharing a job with other callers.
+
+        The file joins the open batch for the same model set. A batch is
+        submitted once it holds max_files files or window_s after its first
+        file arrived, whichever comes first.
+
+        Args:
+            url: Publicly fetchable (e.g. signed) URL of the file
+            models: Batch model names, e.g. ("prosody",) or ("face", "prosody")
+
+        Returns:
+            This file's entries from get_job_predictions
+
+        Raises:
+            TimeoutError: If the job doesn't complete within the poller timeout
+            RuntimeError: If the job, or Hume's processing of this file, fails, or
+                the predictions contain nothing for this URL
+        """
+        key = tuple(sorted(models))
+        batch = self._open.get(key)
+        if batch is None:
+            batch = self._open[key] = _OpenBatch()
+            batch.timer = asyncio.get_running_loop().call_later(self.window_s, self._flush, key)
+
+        future = batch.futures.get(url)
+        if future is None:
+            future = batch.futures[url] = asyncio.get_running_loop().create_future()
+            self.files += 1
+        if len(batch.futures) >= self.max_files:
+            self._flush(key)
+        with stage("hume_batch"):
+            return await asyncio.shield(future)
+
+    def _flush(self, key: Tuple[str, ...]):
+        batch = self._open.pop(key, None)
+        if batch is None:
+            return
+        batch.timer.cancel()
+        task = asyncio.create_task(self._run_job(key, batch.futures))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    @staticmethod
+    def _fail(future: asyncio.Future, error: BaseException):
+        if not future.done():
+            future.set_exception(error)
+            future.exception()  # retrieved, even if the caller went away
+
+    async def _run_job(self, key: Tuple[str, ...], futures: Dict[str, asyncio.Future]):
+        try:
+            job_id = await self.client.expression_measurement.batch.start_inference_job(
+                models=Models(**{name: BATCH_MODELS[name]() for name in key}),
+                urls=list(futures),
+            )
+            self.jobs += 1
+            print(f"[HumeBatchSubmitter] Job {job_id} started for {len(futures)} file(s)")
+            await self.poller.wait(job_id)
+            predictions = await self.client.expression_measurement.batch.get_job_predictions(id=job_id)
+        except BaseException as e:
+            error = e if isinstance(e, Exception) else RuntimeError("Hume batch submission cancelled")
+            for future in futures.values():
+                self._fail(future, error)
+            if not isinstance(e, Exception):
+                raise
+            return
+
+        by_url: Dict[Any, List[UnionPredictResult]] = {}
+        for prediction in predictions:
+            url = getattr(getattr(prediction, "source", None), "url", None)
+            by_url.setdefault(url, []).append(prediction)
+
+        for url, future in futures.items():
+            if future.done():
+                continue
+            file_predictions = by_url.get(url, [])
+            errors = [p.error for p in file_predictions if getattr(p, "error", None)]
+            if not file_predictions:
+                # Hume dropped the file or echoed a different URL; not "no emotions"
+                self._fail(future, RuntimeError("HumeAI returned no predictions for file"))
+            elif errors and not any(getattr(p, "results", None) for p in file_predictions):
+                self._fail(future, RuntimeError(f"HumeAI failed to process file: {errors[0]}"))
+            else:
+                future.set_result(file_predictions)
+
+    async def close(self):
+        """Drop open batches and cancel submitted ones; their callers get a RuntimeError."""
+        for key in list(self._open):
+            batch = self._open.pop(key)
+            batch.timer.cancel()
+            for future in batch.futures.values():
+                self._fail(future, RuntimeError("Hume batch submitter stopped"))
+        for task in list(self._running):
+            task.cancel()
+        await asyncio.gather(*self._running, return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        """Files submitted and jobs used for them."""
+        return {
+            "open_batches": len(self._open),
+            "running_jobs": len(self._running),
+            "jobs": self.jobs,
+            "files": self.files,
+        }
@@ -0,0 +1,207 @@
+"""
+Hume Stream Socket Pool.
+
+Hume's stream API allows one in-flight request per websocket (send_file()
+sends, then waits on recv()), so a single shared connection serializes every
+expression analysis in the service. The pool keeps up to HUME_STREAM_POOL_SIZE
+connections, opens them lazily as concurrent demand grows, and hands each
+caller a socket of its own for the duration of one request.
+
+Sockets are health-checked on checkout; a socket that errors mid-request is
+discarded rather than returned, since its recv() state is unknown. A request
+that fails because the connection dropped is retried once on a fresh socket.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+from hume import AsyncHumeClient
+from websockets.exceptions import ConnectionClosed
+
+from app.timing import record, stage
+
+# Transport failures worth one retry on a new connection
+RECONNECT_ERRORS = (ConnectionClosed, ConnectionError)
+
+
+class _PooledSocket:
+    """One open stream connection and the context manager that owns it."""
+
+    __slots__ = ("ctx", "socket", "opened_at")
+
+    def __init__(self, ctx: Any, socket: Any):
+        self.ctx = ctx
+        self.socket = socket
+        self.opened_at = time.monotonic()
+
+
+class HumeSocketPool:
+    """Bounded, lazily grown pool of Hume stream sockets."""
+
+    def __init__(self, client: AsyncHumeClient, max_size: int):
+        self.client = client
+        self.max_size = max(1, max_size)
+        self._idle: List[_PooledSocket] = []
+        self._size = 0  # open + opening connections
+        self._cond = asyncio.Condition()
+        self._closed = False
+
+        self.opened = 0
+        self.discarded = 0
+        self.reconnects = 0
+        self.checkouts = 0
+        self.waited = 0  # checkouts that found the pool exhausted
+        self.wait_ms_total = 0.0
+
+    @staticmethod
+    def _healthy(conn: _PooledSocket) -> bool:
+        websocket = getattr(conn.socket, "_websocket", None)
+        state = getattr(websocket, "state", None)
+        return state is None or getattr(state, "name", "OPEN") == "OPEN"
+
+    async def _open(self) -> _PooledSocket:
+        ctx = self.client.expression_measurement.stream.connect()
+        with stage("hume_connect"):
+            socket = await ctx.__aenter__()
+        self.opened += 1
+        return _PooledSocket(ctx, socket)
+
+    @staticmethod
+    async def _close(conn: _PooledSocket):
+        try:
+            await conn.ctx.__aexit__(None, None, None)
+        except Exception as e:
+            print(f"[HumeSocketPool] Error closing socket: {e}")
+
+    async def _checkout(self) -> _PooledSocket:
+        start = time.monotonic()
+        waited = False
+        stale: List[_PooledSocket] = []
+        conn: Optional[_PooledSocket] = None
+
+        async with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Hume socket pool is closed")
+                while self._idle and conn is None:
+                    candidate = self._idle.pop()
+                    if self._healthy(candidate):
+                        conn = candidate
+                    else:
+                        self._size -= 1
+                        self.discarded += 1
+                        stale.append(candidate)
+                if conn is not None or self._size < self.max_size:
+                    break
+                waited = True
+                await self._cond.wait()
+            if conn is None:
+                self._size += 1  # reserve the slot before connecting
+        record("hume_socket_wait", time.monotonic() - start)
+
+        for old in stale:
+            await self._close(old)
+
+        if conn is None:
+            try:
+                conn = await self._open()
+            except BaseException:
+                async with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+
+        self.checkouts += 1
+        if waited:
+            self.waited += 1
+            self.wait_ms_total += (time.monotonic() - start) * 1000
+        return conn
+
+    async def _release(self, conn: _PooledSocket):
+        async with self._cond:
+            if not self._closed:
+                self._idle.append(conn)
+                self._cond.notify()
+                return
+            self._size -= 1
+        await self._close(conn)
+
+    async def _discard(self, conn: _PooledSocket):
+        async with self._cond:
+            self._size -= 1
+            self.discarded += 1
+            self._cond.notify()
+        await self._close(conn)
+
+    @asynccontextmanager
+    async def acquire(self):
+        """
+        Check out a socket for one request.
+
+        Yields:
+            An AsyncStreamSocketClient nobody else is using. It goes back to
+            the pool on success and is closed if the request raised.
+        """
+        conn = await self._checkout()
+        try:
+            yield conn.socket
+        except BaseException:
+            await asyncio.shield(self._discard(conn))
+            raise
+        await self._release(conn)
+
+    async def send_file(self, file_path: str, config: Any) -> Any:
+        """
+        send_file() on a pooled socket, reconnecting once if the connection dropped.
+
+        Args:
+            file_path: Media file to analyze
+            config: Stream model config
+
+        Returns:
+            The raw stream API response
+        """
+        try:
+            async with self.acquire() as socket:
+                with stage("hume_send"):
+                    return await socket.send_file(file_path, config=config)
+        except RECONNECT_ERRORS as e:
+            self.reconnects += 1
+            print(f"[HumeSocketPool] Connection lost ({e}), retrying on a new socket")
+        async with self.acquire() as socket:
+            with stage("hume_send"):
+                return await socket.send_file(file_path, config=config)
+
+    async def warm(self, count: int = 1):
+        """Open sockets ahead of the first request (up to max_size)."""
+        for _ in range(min(count, self.max_size)):
+            conn = await self._checkout()
+            await self._release(conn)
+
+    async def close(self):
+        """Close idle sockets now and in-use ones as they are released."""
+        async with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            await self._close(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool occupancy and checkout wait totals."""
+        idle = len(self._idle)
+        return {
+            "max_size": self.max_size,
+            "open": self._size,
+            "idle": idle,
+            "in_use": self._size - idle,
+            "opened": self.opened,
+            "discarded": self.discarded,
+            "reconnects": self.reconnects,
+            "checkouts": self.checkouts,
+            "waited": self.waited,
+            "wait_ms_total": round(self.wait_ms_total, 1),
+        }
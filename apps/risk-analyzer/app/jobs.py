@@ -0,0 +1,247 @@
+"""
+Asynchronous analysis jobs.
+
+POST /jobs/{analysis_type} spools the upload, queues the analysis and
+returns a job ID straight away, so a slow Hume or FaceMesh pass doesn't hold
+the client connection open (or trip a proxy timeout). A fixed set of queue
+workers feeds the analyzer pool from a bounded queue; callers poll
+GET /jobs/{id} or pass a callback URL to be notified when the job finishes.
+Callback URLs must match JOB_CALLBACK_ALLOWED_HOSTS, so callers can't make
+the service POST results to arbitrary (e.g. internal) addresses. Finished
+jobs are kept for JOB_RESULT_TTL seconds.
+"""
+
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from fastapi import HTTPException
+
+from app.config import config
+from app.http_client import get_http_client
+
+
+class JobQueueFull(Exception):
+    """The job queue is at capacity."""
+
+
+def check_callback_url(url: str) -> str:
+    """
+    Validate a callbackUrl against JOB_CALLBACK_ALLOWED_HOSTS.
+
+    An entry with a scheme ("https://svc/hooks/") matches URLs with the same
+    scheme and host under that path; a bare entry ("svc" or "svc:8080")
+    matches that host (and port) over http or https.
+
+    Returns:
+        The URL, unchanged
+
+    Raises:
+        HTTPException: 400 if the URL is malformed or not allowed
+    """
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid callbackUrl")
+    if parts.scheme not in ("http", "https") or not parts.hostname or parts.username or parts.password:
+        raise HTTPException(status_code=400, detail="callbackUrl must be an http(s) URL without credentials")
+
+    host = parts.hostname.lower()
+    for entry in config.JOB_CALLBACK_ALLOWED_HOSTS.split(","):
+        entry = entry.strip().lower()
+        if not entry:
+            continue
+        if "://" in entry:
+            base = urlsplit(entry)
+            if (
+                parts.scheme == base.scheme
+                and host == base.hostname
+                and port == base.port
+                and parts.path.startswith(base.path or "/")
+                and ".." not in parts.path.split("/")
+            ):
+                return url
+        else:
+            allowed = urlsplit(f"//{entry}")
+            if host == allowed.hostname and (allowed.port is None or port == allowed.port):
+                return url
+    raise HTTPException(status_code=400, detail="callbackUrl host is not in JOB_CALLBACK_ALLOWED_HOSTS")
+
+
+class Job:
+    """One queued analysis and, once finished, its outcome."""
+
+    __slots__ = (
+        "id", "analysis_type", "status", "created_at", "started_at", "finished_at",
+        "result", "error", "callback_url", "run", "cleanup",
+    )
+
+    def __init__(
+        self,
+        analysis_type: str,
+        run: Callable[[], Awaitable[Dict[str, Any]]],
+        cleanup: Callable[[], None],
+        callback_url: Optional[str],
+    ):
+        self.id = uuid.uuid4().hex
+        self.analysis_type = analysis_type
+        self.status = "queued"  # queued, running, completed, failed
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.callback_url = callback_url
+        self.run = run
+        self.cleanup = cleanup
+
+    def to_dict(self) -> Dict[str, Any]:
+        def iso(ts: Optional[float]) -> Optional[str]:
+            return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat() if ts is not None else None
+
+        return {
+            "id": self.id,
+            "type": self.analysis_type,
+            "status": self.status,
+            "created_at": iso(self.created_at),
+            "started_at": iso(self.started_at),
+            "finished_at": iso(self.finished_at),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """Bounded in-process queue of analysis jobs with a fixed worker count."""
+
+    def __init__(self, max_queued: int, workers: int, result_ttl: float):
+        self.max_queued = max_queued
+        self.workers = max(1, workers)
+        self.result_ttl = result_ttl
+        self._jobs: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._callbacks: set = set()
+
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+
+    def start(self):
+        """Start the queue workers (idempotent)."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        print(f"[JobQueue] Started {self.workers} workers (queue size {self.max_queued})")
+
+    async def stop(self):
+        """Stop the workers; queued jobs are dropped and their files deleted."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while self._queue is not None and not self._queue.empty():
+            self._queue.get_nowait().cleanup()
+
+    def submit(
+        self,
+        analysis_type: str,
+        run: Callable[[], Awaitable[Dict[str, Any]]],
+        cleanup: Callable[[], None],
+        callback_url: Optional[str] = None,
+    ) -> Job:
+        """
+        Queue an analysis.
+
+        Args:
+            analysis_type: audio, video, combined, expression or segment
+            run: Runs the analysis and returns the response body
+            cleanup: Deletes the job's scratch files; called once the job is done
+            callback_url: Optional URL to POST the finished job to
+
+        Returns:
+            The queued job
+
+        Raises:
+            JobQueueFull: If max_queued jobs are already waiting
+        """
+        self.start()
+        self._purge()
+        job = Job(analysis_type, run, cleanup, callback_url)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise JobQueueFull(f"Job queue is full ({self.max_queued} waiting)")
+        self._jobs[job.id] = job
+        self.submitted += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """A job that hasn't expired yet, or None."""
+        self._purge()
+        return self._jobs.get(job_id)
+
+    def _purge(self):
+        cutoff = time.time() - self.result_ttl
+        for job_id in [j.id for j in self._jobs.values() if j.finished_at is not None and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                job.result = await job.run()
+                job.status = "completed"
+                self.completed += 1
+            except Exception as e:
+                job.error = str(e.detail) if isinstance(e, HTTPException) else str(e)
+                job.status = "failed"
+                self.failed += 1
+                print(f"[JobQueue] Job {job.id} ({job.analysis_type}) failed: {job.error}")
+            finally:
+                job.finished_at = time.time()
+                job.run = None
+                job.cleanup()
+
+            if job.callback_url:
+                task = asyncio.create_task(self._notify(job))
+                self._callbacks.add(task)
+                task.add_done_callback(self._callbacks.discard)
+
+    async def _notify(self, job: Job):
+        """POST the finished job to its callback URL (best effort)."""
+        try:
+            # A redirect could lead anywhere; only the checked URL is called
+            resp = await get_http_client().post(job.callback_url, json=job.to_dict(), follow_redirects=False)
+            if not resp.is_success:
+                print(f"[JobQueue] Callback for {job.id} returned {resp.status_code}")
+        except Exception as e:
+            print(f"[JobQueue] Callback for {job.id} failed: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """Queue depth and job totals."""
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": sum(1 for j in self._jobs.values() if j.status == "running"),
+            "retained": len(self._jobs),
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+
+job_queue = JobQueue(
+    max_queued=config.JOB_QUEUE_SIZE,
+    workers=config.JOB_WORKERS,
+    result_ttl=config.JOB_RESULT_TTL,
+)
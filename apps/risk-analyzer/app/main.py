@@ -1,25 +1,41 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
-from typing import Optional
-import shutil
+from starlette.datastructures import UploadFile as FormFile
+from starlette.routing import Match
+from pydantic import BaseModel, ValidationError
+from typing import Optional, Any, Awaitable, Callable, Dict, List, Tuple
+import json
 import tempfile
 import os
 import asyncio
 from pathlib import Path
 
-from app.audio_analyzer import analyze_audio
-from app.video_analyzer import analyze_video
-from app.hume_analyzer import HumeAnalyzer, calculate_hume_risk_score
+from app.audio_analyzer import analyze_audio, ANALYZER_VERSION as AUDIO_ANALYZER_VERSION
+from app.video_analyzer import analyze_video, ANALYZER_VERSION as VIDEO_ANALYZER_VERSION
+from app.hume_analyzer import HumeAnalyzer, calculate_hume_risk_score, ANALYZER_VERSION as HUME_ANALYZER_VERSION
 from app.fusion import calculate_risk_score
 from app.pdf_generator import generate_consent_form
+from app.executor import run_in_pool, start_pool, shutdown_pool
+from app import stats
+from app import metrics
+from app.timing import stage
+from app.profiling import request_profile, profiling
+from app.uploads import spool_upload, scratch_dir, link_spooled, SpooledUpload
+from app.result_cache import result_cache
+from app.single_flight import inflight
+from app.signed_urls import signed_url_cache
+from app.jobs import job_queue, JobQueueFull, check_callback_url
+from app.admission import limiters, admit_unit, admitted
+from app.storage import upload_streamed, upload_resumable, place_local
+from app.http_client import start_http_client, close_http_client, get_http_client, pool_stats as http_pool_stats
+from app.media import probe_media, extract_audio
 
 # HumeAI & Supabase Integration
 import time
 import httpx
 import uuid
-from hume import AsyncHumeClient
 from app.config import config
 
 app = FastAPI(
@@ -37,6 +53,49 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def limit_request_body(request: Request, call_next):
+    """Reject oversized uploads before the multipart body is read at all."""
+    content_length = request.headers.get("content-length")
+    if (
+        config.MAX_UPLOAD_BYTES
+        and content_length
+        and content_length.isdigit()
+        and int(content_length) > config.MAX_UPLOAD_BYTES
+    ):
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"Request body exceeds {config.MAX_UPLOAD_BYTES} bytes"},
+        )
+    return await call_next(request)
+
+
+def _route_template(request: Request) -> str:
+    """Route path (e.g. /jobs/{job_id}) the request maps to, so metric labels stay bounded."""
+    for route in app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "unmatched")
+    return "unmatched"
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count requests and time them per endpoint for /metrics."""
+    endpoint = _route_template(request)
+    metrics.http_in_flight.inc(endpoint=endpoint)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        metrics.http_in_flight.dec(endpoint=endpoint)
+        metrics.http_request_duration.observe(time.perf_counter() - start, endpoint=endpoint)
+        metrics.http_requests.inc(endpoint=endpoint, method=request.method, status=str(status))
+
 # Local filesystem fallback when SUPABASE_URL is empty.
 LOCAL_STORAGE_ENABLED = not bool(config.SUPABASE_URL)
 LOCAL_STORAGE_ROOT = Path(__file__).resolve().parent.parent / "storage"
@@ -55,7 +114,10 @@ if hume_analyzer is None:
 
 @app.on_event("startup")
 async def startup_event():
-    """Connect to Hume AI Stream on startup."""
+    """Start the analyzer worker pool and HTTP client, and connect to Hume AI Stream on startup."""
+    start_pool()
+    start_http_client()
+    job_queue.start()
     if hume_analyzer is None:
         return
     try:
@@ -63,12 +125,30 @@ async def startup_event():
     except Exception as e:
         print(f"Warning: Failed to connect to Hume on startup: {e}")
 
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop queued jobs and the analyzer worker pool, close Hume stream sockets and the HTTP client."""
+    await job_queue.stop()
+    shutdown_pool()
+    await close_http_client()
+    if hume_analyzer is not None:
+        await hume_analyzer._disconnect()
+
 class AnalysisResponse(BaseModel):
     success: bool
     risk_score: str  # LOW, MEDIUM, HIGH
     confidence: float
     metrics: dict
     details: Optional[str] = None
+    cache: Optional[str] = None  # hit, miss, bypass (noCache) or partial
+
+
+# Lifetime of the signed URL Hume fetches a batch job's file from
+HUME_BATCH_URL_TTL = 3600
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.m4a', '.webm')
+VIDEO_EXTENSIONS = ('.mp4', '.webm', '.mov')
 
 
 class BaselineModel(BaseModel):
@@ -78,49 +158,351 @@ class BaselineModel(BaseModel):
     lip_tension: Optional[float] = None
 
 
+class BatchSegment(BaseModel):
+    """One segment of an /analyze-batch manifest; audio/video name multipart file fields."""
+    id: Optional[str] = None
+    audio: Optional[str] = None
+    video: Optional[str] = None
+    expression: bool = True
+    noAudio: bool = False
+    baseline: BaselineModel = BaselineModel()
+
+
+class BatchSegmentResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    audio: Optional[AnalysisResponse] = None
+    video: Optional[AnalysisResponse] = None
+    expression: Optional[AnalysisResponse] = None
+    errors: Dict[str, str] = {}  # analysis -> error, for partial failures
+
+
+class BatchResponse(BaseModel):
+    success: bool  # True only if every requested analysis succeeded
+    failed: int
+    segments: List[BatchSegmentResult]
+
+
+class JobResponse(BaseModel):
+    id: str
+    type: str
+    status: str  # queued, running, completed, failed
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    result: Optional[AnalysisResponse] = None
+    error: Optional[str] = None
+
+
+# Multipart file fields each job type takes (same as its /analyze-* endpoint)
+JOB_FILE_FIELDS = {
+    "audio": {"file": AUDIO_EXTENSIONS},
+    "video": {"file": VIDEO_EXTENSIONS},
+    "expression": {"file": VIDEO_EXTENSIONS},
+    "segment": {"file": VIDEO_EXTENSIONS},
+    "combined": {"audio_file": AUDIO_EXTENSIONS, "video_file": VIDEO_EXTENSIONS},
+}
+
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "risk-analyzer"}
 
 
+@app.get("/stats")
+async def stats_endpoint():
+    """Service counters (FaceMesh graph reuse, Hume socket pool and batch jobs, ...)."""
+    snapshot = stats.snapshot()
+    snapshot["singleflight_in_flight"] = inflight.in_flight()
+    snapshot["http_pool"] = http_pool_stats()
+    snapshot["signed_url_cache"] = signed_url_cache.stats()
+    snapshot["jobs"] = job_queue.stats()
+    snapshot["admission"] = {name: limiter.stats() for name, limiter in limiters.items()}
+    if hume_analyzer is not None:
+        snapshot["hume_socket_pool"] = hume_analyzer.socket_pool.stats()
+        snapshot["hume_jobs"] = hume_analyzer.job_poller.stats()
+        snapshot["hume_batches"] = hume_analyzer.batch_submitter.stats()
+    return snapshot
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus metrics: request and per-stage latency histograms, in-flight and pool gauges."""
+    for name, value in stats.snapshot().items():
+        metrics.events.set_total(value, event=name)
+    for name, limiter in limiters.items():
+        metrics.admission_active.set(limiter.active, analyzer=name)
+        metrics.admission_waiting.set(limiter.waiting, analyzer=name)
+        metrics.admission_rejected.set_total(limiter.rejected, analyzer=name)
+    metrics.job_queue_depth.set(job_queue.stats()["queued"])
+    http_pool = http_pool_stats()
+    metrics.http_pool_connections.set(http_pool["active"], state="active")
+    metrics.http_pool_connections.set(http_pool["idle"], state="idle")
+    if hume_analyzer is not None:
+        socket_pool = hume_analyzer.socket_pool.stats()
+        metrics.hume_sockets.set(socket_pool["in_use"], state="in_use")
+        metrics.hume_sockets.set(socket_pool["idle"], state="idle")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+def _record_video_stats(metrics: dict):
+    """Tally per-worker FaceMesh graph reuse reported back with a video result."""
+    graph = metrics.get("facemesh_graph")
+    if graph:
+        stats.incr(f"facemesh_graphs_{graph}")
+
+
+async def _timed(awaitable: Awaitable[Any]) -> Tuple[Any, float]:
+    """Await and return (result, wall time in ms)."""
+    start = time.perf_counter()
+    result = await awaitable
+    return result, round((time.perf_counter() - start) * 1000, 1)
+
+
+async def _cached_metrics(
+    analyzer: str,
+    version: str,
+    upload: SpooledUpload,
+    params: Dict[str, Any],
+    compute: Callable[[str], Awaitable[Dict[str, Any]]],
+    use_cache: bool = True,
+) -> Tuple[Dict[str, Any], str]:
+    """
+    Run one analyzer through the result cache.
+
+    Misses are coalesced: concurrent requests for the same analyzer, file
+    contents and params share one computation, counted as
+    singleflight_coalesced_<analyzer> in /stats. The shared run reads its
+    own hardlink of the file, because the request that started it may return
+    (and delete its upload) while others still wait. The run also writes the
+    cache itself, including for noCache requests, which only skip the lookup.
+    Profiled requests skip both the lookup and coalescing, so their stage
+    timings and cProfile dumps are their own.
+
+    Args:
+        compute: Runs the analyzer on the file at the given path
+
+    Returns:
+        Tuple of (metrics, cache status: hit / miss / bypass)
+    """
+    key = result_cache.make_key(analyzer, version, upload.sha256, params)
+    use_cache = use_cache and config.RESULT_CACHE_ENABLED
+    if use_cache:
+        metrics = await result_cache.aget(key)
+        if metrics is not None:
+            stats.incr(f"result_cache_hits_{analyzer}")
+            return dict(metrics), "hit"
+        stats.incr(f"result_cache_misses_{analyzer}")
+
+    if profiling():
+        # A shared run would record its stages in the leader's profile only
+        return dict(await compute(upload.path)), "bypass"
+
+    async def run(path: str) -> Dict[str, Any]:
+        metrics = await compute(path)
+        if config.RESULT_CACHE_ENABLED:
+            await result_cache.aput(key, dict(metrics))
+        return metrics
+
+    def start() -> "asyncio.Task[Dict[str, Any]]":
+        # Linked before the first await, while the caller's file still exists
+        link = link_spooled(upload.path)
+        task = asyncio.ensure_future(run(link or upload.path))
+        if link:
+            task.add_done_callback(lambda _: os.unlink(link))
+        return task
+
+    metrics, shared = await inflight.do(key, start)
+    if shared:
+        stats.incr(f"singleflight_coalesced_{analyzer}")
+    return dict(metrics), "miss" if use_cache else "bypass"
+
+
+def _combined_cache_status(*statuses: Optional[str]) -> Optional[str]:
+    """One status for a response built from several analyzer runs."""
+    present = {s for s in statuses if s}
+    if not present:
+        return None
+    return present.pop() if len(present) == 1 else "partial"
+
+
+def _audio_metrics(upload: SpooledUpload, use_cache: bool = True) -> Awaitable[Tuple[Dict[str, Any], str]]:
+    async def compute(path: str):
+        async with limiters["audio"].slot():
+            return await run_in_pool(analyze_audio, path)
+
+    return _cached_metrics(
+        "audio", AUDIO_ANALYZER_VERSION, upload, {},
+        compute, use_cache,
+    )
+
+
+def _video_metrics(
+    upload: SpooledUpload,
+    sample_rate_hz: Optional[float] = None,
+    use_cache: bool = True,
+) -> Awaitable[Tuple[Dict[str, Any], str]]:
+    if sample_rate_hz is None:
+        sample_rate_hz = config.VIDEO_SAMPLE_RATE_HZ
+
+    async def compute(path: str):
+        async with limiters["video"].slot():
+            metrics = await run_in_pool(analyze_video, path, sample_rate_hz)
+        _record_video_stats(metrics)
+        return metrics
+
+    return _cached_metrics(
+        "video", VIDEO_ANALYZER_VERSION, upload, {"sample_rate_hz": sample_rate_hz},
+        compute, use_cache,
+    )
+
+
+async def _audio_analysis(
+    upload: SpooledUpload,
+    baseline_jitter: float = 0.8,
+    baseline_pitch_sd: float = 15.0,
+    use_cache: bool = True,
+) -> AnalysisResponse:
+    """Parselmouth voice analysis of a spooled audio file."""
+    metrics, cache = await _audio_metrics(upload, use_cache)
+    risk_score, confidence = calculate_risk_score(
+        audio_metrics=metrics,
+        video_metrics=None,
+        baseline={"jitter": baseline_jitter, "pitch_sd": baseline_pitch_sd}
+    )
+    return AnalysisResponse(
+        success=True,
+        risk_score=risk_score,
+        confidence=confidence,
+        metrics=metrics,
+        details="Audio analysis complete using Parselmouth & HumeAI.",
+        cache=cache,
+    )
+
+
+async def _video_analysis(
+    upload: SpooledUpload,
+    baseline_blink_rate: float = 17.0,
+    baseline_lip_tension: float = 0.45,
+    sample_rate_hz: Optional[float] = None,
+    use_cache: bool = True,
+) -> AnalysisResponse:
+    """MediaPipe FaceMesh analysis of a spooled video file."""
+    metrics, cache = await _video_metrics(upload, sample_rate_hz, use_cache)
+    risk_score, confidence = calculate_risk_score(
+        audio_metrics=None,
+        video_metrics=metrics,
+        baseline={"blink_rate": baseline_blink_rate, "lip_tension": baseline_lip_tension}
+    )
+    return AnalysisResponse(
+        success=True,
+        risk_score=risk_score,
+        confidence=confidence,
+        metrics=metrics,
+        details="Video analysis complete using MediaPipe.",
+        cache=cache,
+    )
+
+
+async def _expression_analysis(
+    upload: SpooledUpload,
+    no_audio: bool = False,
+    use_cache: bool = True,
+) -> AnalysisResponse:
+    """HumeAI expression analysis of a spooled video file (503 without HUME_API_KEY)."""
+    if hume_analyzer is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Hume analysis unavailable: HUME_API_KEY not configured",
+        )
+    async def compute(path: str):
+        async with limiters["expression"].slot():
+            return await hume_analyzer.analyze_video(path, has_audio=not no_audio)
+
+    metrics, cache = await _cached_metrics(
+        "expression", HUME_ANALYZER_VERSION, upload, {"has_audio": not no_audio},
+        compute, use_cache,
+    )
+
+    # Calculate risk score specifically for Hume metrics
+    risk_score, confidence = calculate_hume_risk_score(metrics)
+
+    return AnalysisResponse(
+        success=True,
+        risk_score=risk_score,
+        confidence=confidence,
+        metrics=metrics,
+        details="Expression analysis complete using HumeAI.",
+        cache=cache,
+    )
+
+
+async def _expression_batch_analysis(
+    upload: SpooledUpload,
+    no_audio: bool = False,
+    use_cache: bool = True,
+) -> AnalysisResponse:
+    """
+    HumeAI expression analysis of a spooled video file through the Batch API.
+
+    Used by queued expression jobs: the file goes to storage and its signed
+    URL joins a shared batch job, leaving the stream sockets to interactive
+    /analyze-expression requests. 503 without HUME_API_KEY.
+    """
+    if hume_analyzer is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Hume analysis unavailable: HUME_API_KEY not configured",
+        )
+    async def compute(path: str):
+        storage_path = await _upload_to_supabase(path, upload.sha256[:16], claim_id="expression-jobs")
+        signed_url = await _get_signed_url(storage_path, expires_in=HUME_BATCH_URL_TTL)
+        return await hume_analyzer.analyze_video_batch(signed_url, has_audio=not no_audio)
+
+    metrics, cache = await _cached_metrics(
+        "expression", HUME_ANALYZER_VERSION, upload, {"has_audio": not no_audio, "api": "batch"},
+        compute, use_cache,
+    )
+    risk_score, confidence = calculate_hume_risk_score(metrics)
+
+    return AnalysisResponse(
+        success=True,
+        risk_score=risk_score,
+        confidence=confidence,
+        metrics=metrics,
+        details="Expression analysis complete using HumeAI (batch).",
+        cache=cache,
+    )
+
+
 @app.post("/analyze-audio", response_model=AnalysisResponse)
 async def analyze_audio_endpoint(
     file: UploadFile = File(...),
     sessionId: str = "unknown",
     baseline_jitter: float = 0.8,
     baseline_pitch_sd: float = 15.0,
+    noCache: bool = False,
+    profile: bool = False,
 ):
     """Analyze audio file for voice risk indicators (Jitter, Pitch SD)."""
-    if not file.filename.endswith(('.wav', '.mp3', '.m4a', '.webm')):
+    if not file.filename.endswith(AUDIO_EXTENSIONS):
         raise HTTPException(status_code=400, detail="Unsupported audio format")
 
-    # Save to temp file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
-
-    try:
-        # Run Parselmouth Analysis (Existing)
-        metrics = analyze_audio(tmp_path)
+    with request_profile("audio", profile) as prof:
+        # Stream to scratch storage
+        upload = await spool_upload(file)
 
-        risk_score, confidence = calculate_risk_score(
-            audio_metrics=metrics,
-            video_metrics=None,
-            baseline={"jitter": baseline_jitter, "pitch_sd": baseline_pitch_sd}
-        )
-        return AnalysisResponse(
-            success=True,
-            risk_score=risk_score,
-            confidence=confidence,
-            metrics=metrics,
-            details="Audio analysis complete using Parselmouth & HumeAI."
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if os.path.exists(tmp_path):
-            os.unlink(tmp_path)
+        try:
+            return prof.attach(await _audio_analysis(
+                upload, baseline_jitter, baseline_pitch_sd, use_cache=not (noCache or profile)
+            ))
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            if os.path.exists(upload.path):
+                os.unlink(upload.path)
 
 async def _upload_to_supabase(file_path: str, session_id: str, claim_id: str = "unknown", bucket_name: str = None) -> str:
     """Upload file to Supabase Storage, or to local filesystem when SUPABASE_URL is empty."""
@@ -136,27 +518,34 @@ async def _upload_to_supabase(file_path: str, session_id: str, claim_id: str = "
 
     if LOCAL_STORAGE_ENABLED:
         dest = LOCAL_STORAGE_ROOT / bucket_name / storage_path
-        dest.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy(file_path, dest)
+        with stage("storage_upload"):
+            await place_local(file_path, dest)
         print(f"[_upload_to_supabase] (local) saved to {dest}")
         return storage_path
 
     base_url = config.SUPABASE_URL.rstrip('/')
+    content_type = "application/pdf" if ext == ".pdf" else "application/octet-stream"
+    auth_headers = {"Authorization": f"Bearer {config.SUPABASE_SERVICE_ROLE_KEY}"}
+    client = get_http_client()
+
+    # Large files go up in retryable chunks; the rest as one streamed request
+    if os.path.getsize(file_path) > config.STORAGE_RESUMABLE_THRESHOLD:
+        with stage("storage_upload"):
+            await upload_resumable(client, base_url, bucket_name, storage_path, file_path, content_type, auth_headers)
+        return storage_path
+
     url = f"{base_url}/storage/v1/object/{bucket_name}/{storage_path}"
     headers = {
-        "Authorization": f"Bearer {config.SUPABASE_SERVICE_ROLE_KEY}",
+        **auth_headers,
         "x-upsert": "true",
-        "Content-Type": "application/pdf" if ext == ".pdf" else "application/octet-stream"
+        "Content-Type": content_type
     }
 
-    async with httpx.AsyncClient() as client:
-        with open(file_path, 'rb') as f:
-            file_content = f.read()
-
-        resp = await client.post(url, content=file_content, headers=headers)
-        if not resp.is_success:
-            print(f"[_upload_to_supabase] Upload failed: {resp.text}")
-        resp.raise_for_status()
+    with stage("storage_upload"):
+        resp = await upload_streamed(client, url, file_path, headers)
+    if not resp.is_success:
+        print(f"[_upload_to_supabase] Upload failed: {resp.text}")
+    resp.raise_for_status()
 
     return storage_path
 
@@ -175,7 +564,9 @@ async def generate_consent_pdf_endpoint(request: GenerateConsentRequest):
     pdf_path = None
     try:
         data = request.dict()
-        pdf_path = generate_consent_form(data)
+        async with limiters["pdf"].slot():
+            with stage("pdf_render"):
+                pdf_path = await asyncio.to_thread(generate_consent_form, data)
         
         # Ensure bucket exists in Supabase.
         bucket_name = "consent_form"
@@ -191,6 +582,8 @@ async def generate_consent_pdf_endpoint(request: GenerateConsentRequest):
              "signed_url": signed_url,
              "file_size": file_size
         }
+    except HTTPException:
+        raise
     except httpx.HTTPStatusError as e:
         print(f"[GenerateConsent] Supabase API Error: {e.response.text}")
         raise HTTPException(status_code=500, detail=f"Supabase Error: {e.response.text}")
@@ -211,6 +604,10 @@ async def _get_signed_url(storage_path: str, bucket_name: str = None, expires_in
     if LOCAL_STORAGE_ENABLED:
         return f"{LOCAL_STORAGE_PUBLIC_BASE.rstrip('/')}/storage/{bucket_name}/{storage_path}"
 
+    cached = signed_url_cache.get(bucket_name, storage_path, expires_in)
+    if cached:
+        return cached
+
     base_url = config.SUPABASE_URL.rstrip('/')
     url = f"{base_url}/storage/v1/object/sign/{bucket_name}/{storage_path}"    
     headers = {
@@ -221,13 +618,14 @@ async def _get_signed_url(storage_path: str, bucket_name: str = None, expires_in
     # Default: 1 year = 31536000 seconds
     payload = {"expiresIn": expires_in}
     
-    async with httpx.AsyncClient() as client:
+    client = get_http_client()
+    with stage("storage_sign"):
         resp = await client.post(url, json=payload, headers=headers)
-        if not resp.is_success:
-            print(f"[_get_signed_url] Error Response: {resp.text}")
-            resp.raise_for_status()
-            
-        data = resp.json()
+    if not resp.is_success:
+        print(f"[_get_signed_url] Error Response: {resp.text}")
+        resp.raise_for_status()
+        
+    data = resp.json()
         
     signed_url = data.get("signedURL") or data.get("signedUrl")
     if not signed_url:
@@ -237,120 +635,84 @@ async def _get_signed_url(storage_path: str, bucket_name: str = None, expires_in
     if signed_url.startswith('/'):
         signed_url = f"{base_url}/storage/v1{signed_url}"
         
+    signed_url_cache.put(bucket_name, storage_path, expires_in, signed_url)
     return signed_url
 
-async def analyze_with_hume(file_path: str, session_id: str = "default"):
-    try:
-        if not config.HUME_API_KEY:
-             print("HumeAI Error: HUME_API_KEY not configured")
-             return None
-             
-        client = AsyncHumeClient(api_key=config.HUME_API_KEY)
-        
-        # 1. Upload to Supabase and get signed URL
-        storage_path = await _upload_to_supabase(file_path, session_id, claim_id="unknown")
-        signed_url = await _get_signed_url(storage_path)
-        print(f"File uploaded to Supabase, signed URL generated (valid for 1 year)")
-
-        # 2. Configure Prosody model for Audio
-        from hume.expression_measurement.batch import Models
-        from hume.expression_measurement.batch.types import Prosody
-        models = Models(prosody=Prosody())
-        
-        # 3. Start Inference Job using URLs
-        # Correct argument for URLs is 'urls' in AsyncBatchClient.start_inference_job
-        job_id = await client.expression_measurement.batch.start_inference_job(
-            models=models,
-            urls=[signed_url]
-        )
-        print(f"Hume Job Started: {job_id}")
-        
-        # Poll for completion
-        timeout = 60
-        start_time = asyncio.get_event_loop().time()
-        
-        while (asyncio.get_event_loop().time() - start_time) < timeout:
-            job_details = await client.expression_measurement.batch.get_job_details(job_id)
-            status = job_details.state.status
-            
-            if status == "COMPLETED":
-                break
-            if status == "FAILED":
-                print(f"Hume Job Failed: {job_details.state.message}")
-                return None
-                
-            await asyncio.sleep(2)
-        else:
-            print("Hume Job Timed Out")
-            return None
-            
-        # Get Predictions
-        job_predictions = await client.expression_measurement.batch.get_job_predictions(id=job_id)
-        
-        top_emotions = []
-        if job_predictions and job_predictions[0].results:
-            emotions_sum = {}
-            total_segments = 0
-            
-            for file_pred in job_predictions:
-                if not file_pred.results or not file_pred.results.predictions:
-                    continue
-                for prediction in file_pred.results.predictions:
-                     if hasattr(prediction.models, 'prosody') and prediction.models.prosody:
-                        for grouped in prediction.models.prosody.grouped_predictions:
-                            for segment in grouped.predictions:
-                                total_segments += 1
-                                for emotion in segment.emotions:
-                                    emotions_sum[emotion.name] = emotions_sum.get(emotion.name, 0) + emotion.score
-            
-            if total_segments > 0:
-                for name in emotions_sum:
-                    emotions_sum[name] /= total_segments
-
-                sorted_emotions = sorted(emotions_sum.items(), key=lambda x: x[1], reverse=True)
-                top_emotions = [{"name": k, "score": round(v, 4)} for k, v in sorted_emotions[:5]]
-            
-        return top_emotions
-
-    except Exception as e:
-        print(f"HumeAI Error: {e}")
-        return None
-
 
 @app.post("/analyze-video", response_model=AnalysisResponse)
 async def analyze_video_endpoint(
     file: UploadFile = File(...),
     baseline_blink_rate: float = 17.0,
     baseline_lip_tension: float = 0.45,
+    sample_rate_hz: Optional[float] = None,
+    noCache: bool = False,
+    profile: bool = False,
 ):
 
     """Analyze video file for visual risk indicators (Blink Rate, Lip Tension)."""
-    if not file.filename.endswith(('.mp4', '.webm', '.mov')):
+    if not file.filename.endswith(VIDEO_EXTENSIONS):
         raise HTTPException(status_code=400, detail="Unsupported video format")
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
+    with request_profile("video", profile) as prof:
+        upload = await spool_upload(file)
 
-    try:
-        metrics = analyze_video(tmp_path)
-        risk_score, confidence = calculate_risk_score(
-            audio_metrics=None,
-            video_metrics=metrics,
-            baseline={"blink_rate": baseline_blink_rate, "lip_tension": baseline_lip_tension}
-        )
-        return AnalysisResponse(
-            success=True,
-            risk_score=risk_score,
-            confidence=confidence,
-            metrics=metrics,
-            details="Video analysis complete using MediaPipe."
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        os.unlink(tmp_path)
+        try:
+            return prof.attach(await _video_analysis(
+                upload, baseline_blink_rate, baseline_lip_tension, sample_rate_hz,
+                use_cache=not (noCache or profile),
+            ))
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            os.unlink(upload.path)
+
+
+async def _combined_analysis(
+    audio_upload: SpooledUpload,
+    video_upload: SpooledUpload,
+    baseline_jitter: float = 0.8,
+    baseline_pitch_sd: float = 15.0,
+    baseline_blink_rate: float = 17.0,
+    baseline_lip_tension: float = 1.0,
+    use_cache: bool = True,
+) -> AnalysisResponse:
+    """Parselmouth + FaceMesh analysis of a spooled audio/video pair, fused into one risk score."""
+    # The modalities share nothing; run them on separate pool workers
+    # so latency is the slower branch, not the sum.
+    ((audio_metrics, audio_cache), audio_ms), ((video_metrics, video_cache), video_ms) = await asyncio.gather(
+        _timed(_audio_metrics(audio_upload, use_cache=use_cache)),
+        _timed(_video_metrics(video_upload, use_cache=use_cache)),
+    )
+
+    risk_score, confidence = calculate_risk_score(
+        audio_metrics=audio_metrics,
+        video_metrics=video_metrics,
+        baseline={
+            "jitter": baseline_jitter,
+            "pitch_sd": baseline_pitch_sd,
+            "blink_rate": baseline_blink_rate,
+            "lip_tension": baseline_lip_tension,
+        }
+    )
+
+    return AnalysisResponse(
+        success=True,
+        risk_score=risk_score,
+        confidence=confidence,
+        metrics={
+            **audio_metrics,
+            **video_metrics,
+            "branch_timings_ms": {
+                "audio": audio_ms,
+                "video": video_ms,
+                "critical_path": "audio" if audio_ms >= video_ms else "video",
+            },
+        },
+        details="Combined audio + video analysis complete.",
+        cache=_combined_cache_status(audio_cache, video_cache),
+    )
 
 
 @app.post("/analyze-combined", response_model=AnalysisResponse)
@@ -361,88 +723,380 @@ async def analyze_combined_endpoint(
     baseline_pitch_sd: float = 15.0,
     baseline_blink_rate: float = 17.0,
     baseline_lip_tension: float = 1.0,
+    noCache: bool = False,
+    profile: bool = False,
 ):
     """Full multimodal analysis of both audio and video."""
-    # Save audio
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(audio_file.filename)[1]) as tmp:
-        tmp.write(await audio_file.read())
-        audio_path = tmp.name
-
-    # Save video
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(video_file.filename)[1]) as tmp:
-        tmp.write(await video_file.read())
-        video_path = tmp.name
+    with request_profile("combined", profile) as prof:
+        audio_upload = await spool_upload(audio_file)
+        try:
+            video_upload = await spool_upload(video_file)
+        except BaseException:
+            os.unlink(audio_upload.path)
+            raise
 
-    try:
-        audio_metrics = analyze_audio(audio_path)
-        video_metrics = analyze_video(video_path)
-
-        risk_score, confidence = calculate_risk_score(
-            audio_metrics=audio_metrics,
-            video_metrics=video_metrics,
-            baseline={
-                "jitter": baseline_jitter,
-                "pitch_sd": baseline_pitch_sd,
-                "blink_rate": baseline_blink_rate,
-                "lip_tension": baseline_lip_tension,
-            }
-        )
-
-        return AnalysisResponse(
-            success=True,
-            risk_score=risk_score,
-            confidence=confidence,
-            metrics={**audio_metrics, **video_metrics},
-            details="Combined audio + video analysis complete."
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        os.unlink(audio_path)
-        os.unlink(video_path)
+        try:
+            return prof.attach(await _combined_analysis(
+                audio_upload, video_upload,
+                baseline_jitter, baseline_pitch_sd, baseline_blink_rate, baseline_lip_tension,
+                use_cache=not (noCache or profile),
+            ))
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            os.unlink(audio_upload.path)
+            os.unlink(video_upload.path)
 
 
 @app.post("/analyze-expression", response_model=AnalysisResponse)
 async def analyze_expression_endpoint(
     file: UploadFile = File(...),
     sessionId: str = "unknown",
-    noAudio: bool = False
+    noAudio: bool = False,
+    noCache: bool = False,
+    profile: bool = False,
 ):
     """Analyze video file for facial expressions using HumeAI."""
-    if not file.filename.endswith(('.mp4', '.webm', '.mov')):
+    if not file.filename.endswith(VIDEO_EXTENSIONS):
         raise HTTPException(status_code=400, detail="Unsupported video format")
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
+    with request_profile("expression", profile) as prof:
+        upload = await spool_upload(file)
+
+        try:
+            return prof.attach(await _expression_analysis(
+                upload, no_audio=noAudio, use_cache=not (noCache or profile)
+            ))
+        except HTTPException:
+            # Deliberate statuses (e.g. 503 when Hume is unconfigured) pass
+            # through instead of being flattened into a 500.
+            raise
+        except Exception as e:
+            print(f"[AnalyzeExpression] Error: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            if os.path.exists(upload.path):
+                os.unlink(upload.path)
+
+
+async def _segment_analysis(
+    video_upload: SpooledUpload,
+    baseline_jitter: float = 0.8,
+    baseline_pitch_sd: float = 15.0,
+    baseline_blink_rate: float = 17.0,
+    baseline_lip_tension: float = 0.45,
+    use_cache: bool = True,
+) -> AnalysisResponse:
+    """
+    Full analysis of one recording segment from its video container alone.
+
+    The audio track is extracted here for Parselmouth, the same file goes to
+    FaceMesh and HumeAI, and the three run concurrently. metrics carries each
+    modality's own result as voice / visual / expression (None when skipped
+    or failed, with the reason in metrics.errors); risk_score fuses voice and
+    visual like /analyze-combined.
+
+    The segment is admitted as a unit: 429 with Retry-After if an analyzer
+    it needs is at capacity, never a partial result from self-inflicted
+    rejections.
+    """
+    video_path = video_upload.path
+    audio_path = os.path.join(scratch_dir() or tempfile.gettempdir(), f"segment-{uuid.uuid4().hex}.wav")
 
     try:
-        # Analyze using Hume
-        if hume_analyzer is None:
+        # Without a probe, let the extraction itself tell us about the audio track
+        probe = await asyncio.to_thread(probe_media, video_path)
+        has_audio = probe["has_audio"] if probe else True
+
+        # No expression slot without Hume: that branch fails straight away
+        analyzers = ["video"]
+        if hume_analyzer is not None:
+            analyzers.append("expression")
+        if has_audio:
+            analyzers.append("audio")
+        with admit_unit(*analyzers):
+            if has_audio:
+                with stage("audio_extract"):
+                    has_audio = await extract_audio(video_path, audio_path)
+
+            kinds = ["visual", "expression"]
+            tasks = [
+                _video_analysis(video_upload, baseline_blink_rate, baseline_lip_tension, use_cache=use_cache),
+                _expression_analysis(video_upload, no_audio=not has_audio, use_cache=use_cache),
+            ]
+            if has_audio:
+                audio_upload = await asyncio.to_thread(SpooledUpload.from_path, audio_path)
+                kinds.append("voice")
+                tasks.append(_audio_analysis(audio_upload, baseline_jitter, baseline_pitch_sd, use_cache=use_cache))
+            outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        if os.path.exists(audio_path):
+            os.unlink(audio_path)
+
+    results: Dict[str, Optional[AnalysisResponse]] = {"voice": None, "visual": None, "expression": None}
+    errors: Dict[str, str] = {}
+    for kind, outcome in zip(kinds, outcomes):
+        if isinstance(outcome, BaseException):
+            detail = outcome.detail if isinstance(outcome, HTTPException) else str(outcome)
+            errors[kind] = str(detail)
+            print(f"[AnalyzeSegment] {kind} failed: {detail}")
+        else:
+            results[kind] = outcome
+
+    if not any(results.values()):
+        raise HTTPException(status_code=500, detail="; ".join(f"{k}: {v}" for k, v in errors.items()))
+
+    risk_score, confidence = calculate_risk_score(
+        audio_metrics=results["voice"].metrics if results["voice"] else None,
+        video_metrics=results["visual"].metrics if results["visual"] else None,
+        baseline={
+            "jitter": baseline_jitter,
+            "pitch_sd": baseline_pitch_sd,
+            "blink_rate": baseline_blink_rate,
+            "lip_tension": baseline_lip_tension,
+        }
+    )
+
+    return AnalysisResponse(
+        success=not errors,
+        risk_score=risk_score,
+        confidence=confidence,
+        metrics={
+            **{kind: result.dict() if result else None for kind, result in results.items()},
+            "has_audio": has_audio,
+            "errors": errors,
+        },
+        details="Segment analysis complete (Parselmouth, MediaPipe & HumeAI).",
+        cache=_combined_cache_status(*(r.cache for r in results.values() if r)),
+    )
+
+
+@app.post("/analyze-segment", response_model=AnalysisResponse)
+async def analyze_segment_endpoint(
+    file: UploadFile = File(...),
+    baseline_jitter: float = 0.8,
+    baseline_pitch_sd: float = 15.0,
+    baseline_blink_rate: float = 17.0,
+    baseline_lip_tension: float = 0.45,
+    noCache: bool = False,
+    profile: bool = False,
+):
+    """Full analysis (voice, visual, expression) of one recording segment; see _segment_analysis."""
+    if not file.filename.endswith(VIDEO_EXTENSIONS):
+        raise HTTPException(status_code=400, detail="Unsupported video format")
+
+    with request_profile("segment", profile) as prof:
+        video_upload = await spool_upload(file)
+        try:
+            return prof.attach(await _segment_analysis(
+                video_upload,
+                baseline_jitter, baseline_pitch_sd, baseline_blink_rate, baseline_lip_tension,
+                use_cache=not (noCache or profile),
+            ))
+        finally:
+            if os.path.exists(video_upload.path):
+                os.unlink(video_upload.path)
+
+
+@app.post("/analyze-batch", response_model=BatchResponse)
+async def analyze_batch_endpoint(request: Request, noCache: bool = False):
+    """
+    Analyze many segments in one multipart request.
+
+    Form fields:
+        manifest: JSON list of segments, e.g.
+            [{"id": "0-5", "audio": "audio_0", "video": "video_0",
+              "expression": true, "noAudio": false, "baseline": {"jitter": 0.8}}]
+        <file fields>: the audio/video parts the manifest refers to by name
+
+    Every analysis of every segment is scheduled at once across the worker
+    pool; results come back in manifest order. A failed analysis is reported
+    in that segment's errors and does not fail the batch. The batch is
+    admitted as a unit: 429 with Retry-After if an analyzer it needs is at
+    capacity; once admitted, its analyses queue for slots instead of being
+    rejected.
+    """
+    async with request.form(max_files=2 * config.BATCH_MAX_SEGMENTS) as form:
+        try:
+            segments = [BatchSegment(**seg) for seg in json.loads(form.get("manifest") or "")]
+        except (ValueError, TypeError, ValidationError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid manifest: {e}")
+        if not segments:
+            raise HTTPException(status_code=400, detail="Manifest has no segments")
+        if len(segments) > config.BATCH_MAX_SEGMENTS:
             raise HTTPException(
-                status_code=503,
-                detail="Hume analysis unavailable: HUME_API_KEY not configured",
+                status_code=400,
+                detail=f"Batch exceeds {config.BATCH_MAX_SEGMENTS} segments",
             )
-        metrics = await hume_analyzer.analyze_video(tmp_path, has_audio=not noAudio)
-        
-        # Calculate risk score specifically for Hume metrics
-        risk_score, confidence = calculate_hume_risk_score(metrics)
-        
-        return AnalysisResponse(
-            success=True,
-            risk_score=risk_score,
-            confidence=confidence,
-            metrics=metrics,
-            details="Expression analysis complete using HumeAI."
+
+        for seg in segments:
+            for field, extensions in (("audio", AUDIO_EXTENSIONS), ("video", VIDEO_EXTENSIONS)):
+                name = getattr(seg, field)
+                if name is None:
+                    continue
+                part = form.get(name)
+                if not isinstance(part, FormFile):
+                    raise HTTPException(status_code=400, detail=f"Missing file part '{name}'")
+                if not (part.filename or "").endswith(extensions):
+                    raise HTTPException(status_code=400, detail=f"Unsupported {field} format in '{name}'")
+
+        analyzers = set()
+        for seg in segments:
+            if seg.audio and not seg.noAudio:
+                analyzers.add("audio")
+            if seg.video:
+                analyzers.add("video")
+                if seg.expression and hume_analyzer is not None:
+                    analyzers.add("expression")
+
+        uploads: Dict[str, SpooledUpload] = {}
+        use_cache = not noCache
+        try:
+            with admit_unit(*analyzers):
+                for name in {n for seg in segments for n in (seg.audio, seg.video) if n}:
+                    uploads[name] = await spool_upload(form[name])
+
+                # (segment index, analysis kind, coroutine) for every requested analysis
+                tasks = []
+                for i, seg in enumerate(segments):
+                    b = seg.baseline
+                    if seg.audio and not seg.noAudio:
+                        tasks.append((i, "audio", _audio_analysis(
+                            uploads[seg.audio],
+                            b.jitter if b.jitter is not None else 0.8,
+                            b.pitch_sd if b.pitch_sd is not None else 15.0,
+                            use_cache=use_cache,
+                        )))
+                    if seg.video:
+                        tasks.append((i, "video", _video_analysis(
+                            uploads[seg.video],
+                            b.blink_rate if b.blink_rate is not None else 17.0,
+                            b.lip_tension if b.lip_tension is not None else 0.45,
+                            use_cache=use_cache,
+                        )))
+                        if seg.expression:
+                            tasks.append((i, "expression", _expression_analysis(
+                                uploads[seg.video], no_audio=seg.noAudio, use_cache=use_cache
+                            )))
+
+                outcomes = await asyncio.gather(*(coro for _, _, coro in tasks), return_exceptions=True)
+        finally:
+            for upload in uploads.values():
+                if os.path.exists(upload.path):
+                    os.unlink(upload.path)
+
+    results = [BatchSegmentResult(index=i, id=seg.id) for i, seg in enumerate(segments)]
+    failed = 0
+    for (i, kind, _), outcome in zip(tasks, outcomes):
+        if isinstance(outcome, BaseException):
+            failed += 1
+            detail = outcome.detail if isinstance(outcome, HTTPException) else str(outcome)
+            results[i].errors[kind] = str(detail)
+            print(f"[AnalyzeBatch] Segment {i} {kind} failed: {detail}")
+        else:
+            setattr(results[i], kind, outcome)
+
+    return BatchResponse(success=failed == 0, failed=failed, segments=results)
+
+
+@app.post("/jobs/{analysis_type}", response_model=JobResponse, status_code=202)
+async def submit_job_endpoint(
+    analysis_type: str,
+    request: Request,
+    callbackUrl: Optional[str] = None,
+    baseline_jitter: float = 0.8,
+    baseline_pitch_sd: float = 15.0,
+    baseline_blink_rate: float = 17.0,
+    baseline_lip_tension: Optional[float] = None,
+    sample_rate_hz: Optional[float] = None,
+    noAudio: bool = False,
+    noCache: bool = False,
+):
+    """
+    Queue an analysis and return its job ID without waiting for the result.
+
+    analysis_type is audio, video, combined, expression or segment; file
+    fields and query parameters are those of the matching /analyze-*
+    endpoint. Expression jobs run on Hume's Batch API, sharing batch jobs
+    with other queued files. Poll GET /jobs/{id}, or pass callbackUrl (a host allowed by
+    JOB_CALLBACK_ALLOWED_HOSTS, else 400) to have the finished job POSTed
+    there. 429 when the job queue is full.
+    """
+    if callbackUrl:
+        check_callback_url(callbackUrl)
+    fields = JOB_FILE_FIELDS.get(analysis_type)
+    if fields is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown analysis type '{analysis_type}' (expected one of {', '.join(JOB_FILE_FIELDS)})",
         )
-    except HTTPException:
-        # Deliberate statuses (e.g. 503 when Hume is unconfigured) pass
-        # through instead of being flattened into a 500.
-        raise
-    except Exception as e:
-        print(f"[AnalyzeExpression] Error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if os.path.exists(tmp_path):
-            os.unlink(tmp_path)
+    if analysis_type == "expression" and hume_analyzer is None:
+        raise HTTPException(status_code=503, detail="Hume analysis unavailable: HUME_API_KEY not configured")
+
+    uploads: Dict[str, SpooledUpload] = {}
+
+    def cleanup():
+        for upload in uploads.values():
+            if os.path.exists(upload.path):
+                os.unlink(upload.path)
+
+    async with request.form(max_files=len(fields)) as form:
+        for field, extensions in fields.items():
+            part = form.get(field)
+            if not isinstance(part, FormFile):
+                raise HTTPException(status_code=400, detail=f"Missing file part '{field}'")
+            if not (part.filename or "").endswith(extensions):
+                raise HTTPException(status_code=400, detail=f"Unsupported format in '{field}'")
+        try:
+            for field in fields:
+                uploads[field] = await spool_upload(form[field])
+        except BaseException:
+            cleanup()
+            raise
+
+    use_cache = not noCache
+    if baseline_lip_tension is None:
+        baseline_lip_tension = 1.0 if analysis_type == "combined" else 0.45
+
+    async def run():
+        # Accepted with a 202 already: wait for analyzer slots, never 429
+        with admitted():
+            if analysis_type == "audio":
+                response = await _audio_analysis(uploads["file"], baseline_jitter, baseline_pitch_sd, use_cache)
+            elif analysis_type == "video":
+                response = await _video_analysis(
+                    uploads["file"], baseline_blink_rate, baseline_lip_tension, sample_rate_hz, use_cache
+                )
+            elif analysis_type == "expression":
+                response = await _expression_batch_analysis(uploads["file"], no_audio=noAudio, use_cache=use_cache)
+            elif analysis_type == "segment":
+                response = await _segment_analysis(
+                    uploads["file"],
+                    baseline_jitter, baseline_pitch_sd, baseline_blink_rate, baseline_lip_tension,
+                    use_cache=use_cache,
+                )
+            else:
+                response = await _combined_analysis(
+                    uploads["audio_file"], uploads["video_file"],
+                    baseline_jitter, baseline_pitch_sd, baseline_blink_rate, baseline_lip_tension,
+                    use_cache=use_cache,
+                )
+            return response.dict()
+
+    try:
+        job = job_queue.submit(analysis_type, run, cleanup, callback_url=callbackUrl)
+    except JobQueueFull as e:
+        cleanup()
+        raise HTTPException(status_code=429, detail=str(e))
+    return JobResponse(**job.to_dict())
+
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job_endpoint(job_id: str):
+    """Status of a queued job, with its result once completed (kept for JOB_RESULT_TTL seconds)."""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return JobResponse(**job.to_dict())
@@ -0,0 +1,186 @@
+"""
+Media container helpers (ffprobe / ffmpeg).
+
+Reads duration, frame rate and stream layout from the container header
+without decoding any frames. Browser-recorded webm often carries no usable
+frame count or FPS for OpenCV, but ffprobe still reports the stream timing.
+Also pulls the audio track out of a video so callers can upload one file,
+and cuts long recordings into chunks for per-chunk analysis.
+"""
+
+import asyncio
+import glob
+import json
+import os
+import subprocess
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.config import config
+
+# Anything outside this range is container garbage, not a real frame rate
+MAX_VALID_FPS = 240.0
+
+# Set once ffprobe turns out not to be installed, so we stop trying (and logging)
+_ffprobe_missing = False
+
+
+def _parse_rate(rate: Optional[str]) -> float:
+    """Parse an ffprobe rational like '30000/1001'; 0.0 if unusable."""
+    try:
+        num, _, den = (rate or "").partition("/")
+        value = float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+    return value if 0 < value <= MAX_VALID_FPS else 0.0
+
+
+def _parse_float(value: Any) -> float:
+    try:
+        parsed = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return parsed if parsed > 0 else 0.0
+
+
+def probe_media(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Probe a media file's container metadata.
+
+    Args:
+        path: Path to the media file
+
+    Returns:
+        Dictionary with duration_s, fps, frame_count (0.0/0 when the container
+        doesn't say) and has_video / has_audio, or None if ffprobe is
+        unavailable or cannot read the file.
+    """
+    global _ffprobe_missing
+    if _ffprobe_missing:
+        return None
+
+    cmd = [
+        config.FFPROBE_PATH, "-v", "error",
+        "-print_format", "json",
+        "-show_entries", "format=duration:stream=codec_type,avg_frame_rate,r_frame_rate,nb_frames,duration",
+        path,
+    ]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, timeout=config.FFPROBE_TIMEOUT, check=True)
+        info = json.loads(proc.stdout or b"{}")
+    except FileNotFoundError:
+        _ffprobe_missing = True
+        print(f"Warning: {config.FFPROBE_PATH} not found — falling back to OpenCV metadata")
+        return None
+    except (OSError, subprocess.SubprocessError, ValueError) as e:
+        print(f"[probe_media] ffprobe failed for {path}: {e}")
+        return None
+
+    streams = info.get("streams") or []
+    video = next((s for s in streams if s.get("codec_type") == "video"), None)
+    has_audio = any(s.get("codec_type") == "audio" for s in streams)
+
+    fps = 0.0
+    frame_count = 0
+    duration = _parse_float((info.get("format") or {}).get("duration"))
+    if video:
+        fps = _parse_rate(video.get("avg_frame_rate")) or _parse_rate(video.get("r_frame_rate"))
+        duration = duration or _parse_float(video.get("duration"))
+        try:
+            frame_count = int(video.get("nb_frames") or 0)
+        except ValueError:
+            frame_count = 0
+        if not frame_count and duration and fps:
+            frame_count = int(round(duration * fps))
+
+    return {
+        "duration_s": duration,
+        "fps": fps,
+        "frame_count": frame_count,
+        "has_video": video is not None,
+        "has_audio": has_audio,
+    }
+
+
+async def extract_audio(video_path: str, audio_path: str) -> bool:
+    """
+    Extract a video's first audio track to mono 44.1 kHz PCM WAV.
+
+    Same format the video-service used to cut on its side, so Parselmouth
+    sees identical input. Only the audio stream is decoded.
+
+    Args:
+        video_path: Source container
+        audio_path: Destination .wav path (overwritten)
+
+    Returns:
+        True if a non-empty audio file was written, False if the video has
+        no audio track (or ffmpeg could not read it)
+    """
+    returncode, stderr = await _run_ffmpeg(
+        "-i", video_path,
+        "-map", "0:a:0?", "-vn",
+        "-acodec", "pcm_s16le", "-ar", "44100", "-ac", "1",
+        audio_path,
+    )
+    if returncode != 0:
+        print(f"[extract_audio] ffmpeg failed for {video_path}: {stderr}")
+        return False
+    # A 44-byte file is a WAV header with no samples
+    return os.path.exists(audio_path) and os.path.getsize(audio_path) > 44
+
+
+async def split_media(path: str, chunk_seconds: float, out_dir: str) -> List[str]:
+    """
+    Cut a media file into consecutive chunks without re-encoding.
+
+    Stream copy can only cut on keyframes, so chunks run to the first
+    keyframe at or after each chunk_seconds boundary. Timestamps restart at
+    zero in every chunk.
+
+    Args:
+        path: Source container
+        chunk_seconds: Target chunk length
+        out_dir: Directory for the chunk files (same extension as the source)
+
+    Returns:
+        Chunk paths in playback order, or an empty list if ffmpeg failed
+    """
+    ext = os.path.splitext(path)[1] or ".mp4"
+    pattern = os.path.join(out_dir, f"chunk_%04d{ext}")
+    returncode, stderr = await _run_ffmpeg(
+        "-i", path,
+        "-map", "0:v:0?", "-map", "0:a:0?",
+        "-c", "copy",
+        "-f", "segment",
+        "-segment_time", f"{chunk_seconds:g}",
+        "-reset_timestamps", "1",
+        pattern,
+    )
+    if returncode != 0:
+        print(f"[split_media] ffmpeg failed for {path}: {stderr}")
+        return []
+    return sorted(glob.glob(os.path.join(out_dir, f"chunk_*{ext}")))
+
+
+async def _run_ffmpeg(*args: str) -> Tuple[int, str]:
+    """
+    Run ffmpeg with FFMPEG_TIMEOUT; returns (exit code, stderr text).
+
+    A missing or unrunnable binary comes back as a failed run (exit code
+    127), like a file ffmpeg can't read, rather than an exception.
+    """
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            config.FFMPEG_PATH, "-y", "-v", "error", *args,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except OSError as e:
+        return 127, f"could not run {config.FFMPEG_PATH}: {e}"
+    try:
+        _, stderr = await asyncio.wait_for(proc.communicate(), timeout=config.FFMPEG_TIMEOUT)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise TimeoutError(f"ffmpeg timed out after {config.FFMPEG_TIMEOUT}s")
+    return proc.returncode, stderr.decode(errors="replace").strip()
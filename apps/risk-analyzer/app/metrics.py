@@ -0,0 +1,192 @@
+"""
+Prometheus metrics, served as text on GET /metrics.
+
+A deliberately small in-process registry (counters, gauges, histograms with
+labels) rendered in the Prometheus text exposition format, so the service
+doesn't need a client library. Stage histograms are fed by app.timing;
+gauges describing pools and queues are set from their stats() right before
+each scrape.
+"""
+
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+from app import timing
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; spans a fast cache hit to a long Hume batch job
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_registry: List["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+            *self._samples(),
+        ]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, value: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def set_total(self, value: float, **labels: str):
+        """Mirror a total kept elsewhere (e.g. app.stats)."""
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """Value that goes up and down."""
+
+    type = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, value: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def dec(self, value: float = 1, **labels: str):
+        self.inc(-value, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    type = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            counts, totals = self._values.setdefault(key, ([0] * len(self.buckets), [0.0]))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            totals[0] += value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(c), t[0])) for k, (c, t) in self._values.items())
+        lines = []
+        names = self.labelnames + ("le",)
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(names, key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def render() -> str:
+    """All metrics in Prometheus text format."""
+    lines: List[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+http_requests = Counter(
+    "risk_analyzer_http_requests_total", "HTTP requests by endpoint, method and status.",
+    ("endpoint", "method", "status"),
+)
+http_request_duration = Histogram(
+    "risk_analyzer_http_request_duration_seconds", "HTTP request latency by endpoint.",
+    ("endpoint",),
+)
+http_in_flight = Gauge(
+    "risk_analyzer_http_requests_in_flight", "HTTP requests currently being served, by endpoint.",
+    ("endpoint",),
+)
+stage_duration = Histogram(
+    "risk_analyzer_stage_duration_seconds",
+    "Time per internal stage (upload_spool, decode, facemesh, praat_*, hume_socket_wait, hume_send, "
+    "storage_upload, pdf_render, ...).",
+    ("stage",),
+)
+events = Counter("risk_analyzer_events_total", "Service event counters (mirrors /stats).", ("event",))
+admission_active = Gauge("risk_analyzer_admission_active", "Analyzer runs holding a slot.", ("analyzer",))
+admission_waiting = Gauge("risk_analyzer_admission_waiting", "Requests waiting for an analyzer slot.", ("analyzer",))
+admission_rejected = Counter(
+    "risk_analyzer_admission_rejected_total", "Requests rejected with 429 per analyzer.", ("analyzer",)
+)
+hume_sockets = Gauge("risk_analyzer_hume_sockets", "Hume stream sockets by state.", ("state",))
+job_queue_depth = Gauge("risk_analyzer_job_queue_depth", "Async jobs waiting for a queue worker.")
+http_pool_connections = Gauge(
+    "risk_analyzer_http_pool_connections", "Outbound HTTP connections by state.", ("state",)
+)
+
+timing.add_observer(lambda name, seconds: stage_duration.observe(seconds, stage=name))
@@ -0,0 +1,123 @@
+"""
+Per-request profiling (?profile=true on the /analyze-* endpoints).
+
+A profiled request collects the stage timings its analysis records (see
+app.timing) and returns them as metrics.profile, so a slow segment shows
+whether decode, FaceMesh, Praat or Hume took the time. With PROFILE_DIR set,
+every analyzer pool call the request makes is also run under cProfile in its
+worker and the stats file is written there, ready to attach to a ticket
+(open with `python -m pstats <file>` or snakeviz).
+"""
+
+import cProfile
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from app import timing
+from app.config import config
+
+_active: ContextVar[Optional["RequestProfile"]] = ContextVar("request_profile", default=None)
+
+
+class RequestProfile:
+    """Stage timings (and cProfile dumps) of one profiled request."""
+
+    def __init__(self, label: str, stages: Dict[str, float]):
+        self.label = label
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{label}-{uuid.uuid4().hex[:8]}"
+        self.started = time.perf_counter()
+        self.stages = stages
+        self.profiles: List[str] = []
+
+    def profile_path(self, fn: Callable[..., Any]) -> Optional[str]:
+        """Where a pool call should dump its cProfile stats (None = don't profile)."""
+        if not config.PROFILE_DIR:
+            return None
+        os.makedirs(config.PROFILE_DIR, exist_ok=True)
+        name = f"{self.id}-{len(self.profiles) + 1}-{getattr(fn, '__name__', 'call')}.prof"
+        path = os.path.join(config.PROFILE_DIR, name)
+        self.profiles.append(path)
+        return path
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Timing breakdown so far.
+
+        Stages of concurrent branches (e.g. audio and video in a combined
+        request) each count in full, so stages_ms can add up to more than
+        total_ms.
+        """
+        report: Dict[str, Any] = {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "stages_ms": {
+                name: round(seconds * 1000, 1)
+                for name, seconds in sorted(self.stages.items(), key=lambda item: -item[1])
+            },
+        }
+        if self.profiles:
+            report["profiles"] = list(self.profiles)
+        return report
+
+    def attach(self, response: Any) -> Any:
+        """Add the breakdown to an AnalysisResponse as metrics.profile."""
+        response.metrics["profile"] = self.report()
+        return response
+
+
+class _NoProfile:
+    """Stand-in when profiling wasn't requested."""
+
+    @staticmethod
+    def attach(response: Any) -> Any:
+        return response
+
+
+@contextmanager
+def request_profile(label: str, enabled: bool) -> Iterator[Any]:
+    """
+    Profile the analysis run inside the block.
+
+    Args:
+        label: Endpoint name, used in profile file names
+        enabled: The request's profile flag; when False the block runs as is
+
+    Yields:
+        An object whose attach(response) adds metrics.profile (a no-op when
+        profiling is off)
+    """
+    if not enabled:
+        yield _NoProfile()
+        return
+    with timing.collect() as stages:
+        profile = RequestProfile(label, stages)
+        token = _active.set(profile)
+        try:
+            yield profile
+        finally:
+            _active.reset(token)
+
+
+def profiling() -> bool:
+    """Whether the current request is profiled."""
+    return _active.get() is not None
+
+
+def profile_path_for(fn: Callable[..., Any]) -> Optional[str]:
+    """cProfile dump path for a pool call made by a profiled request, else None."""
+    profile = _active.get()
+    return profile.profile_path(fn) if profile is not None else None
+
+
+def run_profiled(path: str, fn: Callable[..., Any], *args: Any) -> Any:
+    """Call fn under cProfile and write the stats to path (runs in the worker)."""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return fn(*args)
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
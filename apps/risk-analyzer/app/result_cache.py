@@ -0,0 +1,150 @@
+"""
+Content-addressed analyzer result cache.
+
+Re-running a recording (failed consent step, manual re-run) re-uploads the
+same bytes, so analyzer output is cached by what was analyzed rather than
+by request:
+
+    key = sha256(analyzer, analyzer version, file SHA-256, analyzer params)
+
+Two tiers: an in-memory LRU for the hot set, and a JSON-per-entry directory
+on disk, evicted oldest-first once it outgrows its byte budget. Bumping an
+analyzer's ANALYZER_VERSION invalidates its entries without a flush.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.config import config
+
+
+class ResultCache:
+    """Two-tier (memory LRU + disk) cache of analyzer metrics dicts."""
+
+    def __init__(self, memory_entries: int, disk_dir: str, disk_max_bytes: int):
+        self.memory_entries = memory_entries
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes: Optional[int] = None  # computed on first disk write
+
+    @staticmethod
+    def make_key(analyzer: str, version: str, content_sha256: str, params: Dict[str, Any]) -> str:
+        """Cache key for one analyzer run over one file."""
+        material = json.dumps(
+            [analyzer, version, content_sha256, params], sort_keys=True, default=str
+        )
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up memory, then disk (promoting disk hits into memory)."""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                return value
+
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "r") as f:
+                value = json.load(f)
+            os.utime(path)  # keep recently used entries out of eviction
+        except (OSError, ValueError):
+            return None
+        self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: Dict[str, Any]):
+        """Store in both tiers."""
+        self._remember(key, value)
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(value, f)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"[ResultCache] Disk write failed: {e}")
+            return
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk_bytes()
+            else:
+                self._disk_bytes += size
+            over_budget = self._disk_bytes > self.disk_max_bytes
+        if over_budget:
+            self._evict_disk()
+
+    def _remember(self, key: str, value: Dict[str, Any]):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _entries(self):
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, st.st_mtime, st.st_size
+
+    def _scan_disk_bytes(self) -> int:
+        return sum(size for _, _, size in self._entries())
+
+    def _evict_disk(self):
+        """Delete least recently used entries until the disk tier is at 90% of budget."""
+        entries = sorted(self._entries(), key=lambda e: e[1])
+        total = sum(size for _, _, size in entries)
+        target = int(self.disk_max_bytes * 0.9)
+        for path, _, size in entries:
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        """get() without blocking the event loop on the disk tier."""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                return value
+        if not self.disk_dir:
+            return None
+        return await asyncio.to_thread(self.get, key)
+
+    async def aput(self, key: str, value: Dict[str, Any]):
+        """put() without blocking the event loop on the disk tier."""
+        await asyncio.to_thread(self.put, key, value)
+
+
+result_cache = ResultCache(
+    memory_entries=config.RESULT_CACHE_MEMORY_ENTRIES,
+    disk_dir=config.RESULT_CACHE_DIR,
+    disk_max_bytes=config.RESULT_CACHE_DISK_MAX_BYTES,
+)
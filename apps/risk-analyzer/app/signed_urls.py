@@ -0,0 +1,67 @@
+"""
+Signed-URL cache.
+
+Signing a storage object is a network round-trip, and the URLs it returns
+stay valid for a long time (a year by default), so repeat requests for the
+same object reuse the URL signed earlier. An entry is only handed out for
+the first SIGNED_URL_CACHE_TTL_FRACTION of its lifetime (half, by default),
+so a cached URL never arrives close to expiring.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.config import config
+
+CacheKey = Tuple[str, str, int]  # bucket, storage path, expires_in
+
+
+class SignedUrlCache:
+    """Bounded LRU of signed URLs, dropped well before they expire."""
+
+    def __init__(self, max_entries: int, ttl_fraction: float):
+        self.max_entries = max_entries
+        self.ttl_fraction = ttl_fraction
+        self._entries: "OrderedDict[CacheKey, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, bucket: str, storage_path: str, expires_in: int) -> Optional[str]:
+        """A cached URL that is still early in its lifetime, else None."""
+        key = (bucket, storage_path, expires_in)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, bucket: str, storage_path: str, expires_in: int, signed_url: str):
+        """Remember a URL that was just signed."""
+        if self.max_entries <= 0:
+            return
+        key = (bucket, storage_path, expires_in)
+        evict_at = time.monotonic() + expires_in * self.ttl_fraction
+        with self._lock:
+            self._entries[key] = (signed_url, evict_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        """Entry count and hit/miss totals."""
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+signed_url_cache = SignedUrlCache(
+    max_entries=config.SIGNED_URL_CACHE_ENTRIES,
+    ttl_fraction=config.SIGNED_URL_CACHE_TTL_FRACTION,
+)
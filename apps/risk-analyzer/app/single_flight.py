@@ -0,0 +1,56 @@
+"""
+In-flight request coalescing ("single flight").
+
+The result cache only helps once a run has finished. A caller retrying after
+a timeout, or two sessions uploading the same clip at once, would otherwise
+start a second FaceMesh pass or Hume send_file() over identical bytes while
+the first is still running. Concurrent calls with the same key await one
+shared computation instead.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls by key."""
+
+    def __init__(self):
+        self._calls: Dict[str, "asyncio.Task[Any]"] = {}
+
+    def in_flight(self) -> int:
+        """Number of distinct computations currently running."""
+        return len(self._calls)
+
+    def _forget(self, key: str, task: "asyncio.Task[Any]"):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # retrieved, even if every waiter went away
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run fn() unless a call with the same key is already running.
+
+        The computation is shielded: a caller that disconnects stops waiting,
+        but the run continues for anyone else awaiting it. Errors are shared
+        with every waiter and not remembered, so a later call retries.
+
+        Args:
+            key: Identity of the computation (e.g. a result-cache key)
+            fn: Starts the computation
+
+        Returns:
+            Tuple of (result, shared) where shared is True if this call
+            joined a computation started by another caller
+        """
+        task = self._calls.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        return await asyncio.shield(task), shared
+
+
+inflight = SingleFlight()
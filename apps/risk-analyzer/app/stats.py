@@ -0,0 +1,25 @@
+"""
+In-process service counters, surfaced on GET /stats.
+
+Analyzer workers are separate processes, so anything they count has to be
+reported back with their results and tallied here by the API process.
+"""
+
+import threading
+from collections import Counter
+from typing import Dict
+
+_counters: Counter = Counter()
+_lock = threading.Lock()
+
+
+def incr(name: str, value: int = 1):
+    """Increment a named counter."""
+    with _lock:
+        _counters[name] += value
+
+
+def snapshot() -> Dict[str, int]:
+    """Return a copy of all counters."""
+    with _lock:
+        return dict(_counters)
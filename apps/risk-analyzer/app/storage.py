@@ -0,0 +1,155 @@
+"""
+Object storage transfer helpers.
+
+Uploads stream the file from disk in chunks instead of reading it into
+memory first. Files above STORAGE_RESUMABLE_THRESHOLD use Supabase's
+resumable (TUS) endpoint: the file is sent as a series of fixed-size PATCH
+requests, and when one fails only that chunk is retried, from the offset
+the server confirms it holds. In local-storage mode files are hardlinked
+into place rather than copied byte for byte.
+"""
+
+import asyncio
+import base64
+import os
+import shutil
+from pathlib import Path
+from typing import AsyncIterator, Dict
+
+import httpx
+
+from app.config import config
+
+TUS_VERSION = "1.0.0"
+
+
+async def file_chunks(path: str, chunk_size: int, offset: int = 0, length: int = -1) -> AsyncIterator[bytes]:
+    """
+    Read a file in chunks without blocking the event loop.
+
+    Args:
+        path: File to read
+        chunk_size: Bytes per chunk
+        offset: Where to start
+        length: Bytes to read in total (-1 = to end of file)
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        remaining = length
+        while remaining:
+            size = chunk_size if remaining < 0 else min(chunk_size, remaining)
+            chunk = await asyncio.to_thread(f.read, size)
+            if not chunk:
+                break
+            if remaining > 0:
+                remaining -= len(chunk)
+            yield chunk
+
+
+async def upload_streamed(client: httpx.AsyncClient, url: str, path: str, headers: Dict[str, str]) -> httpx.Response:
+    """POST a file as a streamed request body."""
+    headers = {**headers, "Content-Length": str(os.path.getsize(path))}
+    return await client.post(url, content=file_chunks(path, config.UPLOAD_CHUNK_SIZE), headers=headers)
+
+
+def _tus_metadata(values: Dict[str, str]) -> str:
+    return ",".join(f"{key} {base64.b64encode(value.encode()).decode()}" for key, value in values.items())
+
+
+async def upload_resumable(
+    client: httpx.AsyncClient,
+    base_url: str,
+    bucket_name: str,
+    storage_path: str,
+    path: str,
+    content_type: str,
+    auth_headers: Dict[str, str],
+):
+    """
+    Upload a file through Supabase Storage's resumable (TUS) endpoint.
+
+    Args:
+        client: Shared HTTP client
+        base_url: Supabase project URL
+        bucket_name: Destination bucket
+        storage_path: Object path within the bucket (overwritten if present)
+        path: Local file
+        content_type: Object content type
+        auth_headers: Authorization headers
+
+    Raises:
+        httpx.HTTPStatusError: If the upload cannot be created, or a chunk
+            still fails after STORAGE_CHUNK_RETRIES retries
+    """
+    size = os.path.getsize(path)
+    tus_headers = {**auth_headers, "Tus-Resumable": TUS_VERSION}
+
+    resp = await client.post(
+        f"{base_url}/storage/v1/upload/resumable",
+        headers={
+            **tus_headers,
+            "Upload-Length": str(size),
+            "Upload-Metadata": _tus_metadata({
+                "bucketName": bucket_name,
+                "objectName": storage_path,
+                "contentType": content_type,
+            }),
+            "x-upsert": "true",
+        },
+    )
+    if not resp.is_success:
+        print(f"[upload_resumable] Create failed: {resp.text}")
+    resp.raise_for_status()
+    upload_url = resp.headers["Location"]
+    if upload_url.startswith("/"):
+        upload_url = f"{base_url}{upload_url}"
+
+    offset = 0
+    failures = 0
+    while offset < size:
+        length = min(config.STORAGE_CHUNK_SIZE, size - offset)
+        try:
+            resp = await client.patch(
+                upload_url,
+                content=file_chunks(path, config.UPLOAD_CHUNK_SIZE, offset, length),
+                headers={
+                    **tus_headers,
+                    "Upload-Offset": str(offset),
+                    "Content-Type": "application/offset+octet-stream",
+                    "Content-Length": str(length),
+                },
+            )
+            resp.raise_for_status()
+            offset = int(resp.headers.get("Upload-Offset", offset + length))
+            failures = 0
+        except (httpx.TransportError, httpx.HTTPStatusError) as e:
+            failures += 1
+            if failures > config.STORAGE_CHUNK_RETRIES:
+                raise
+            print(f"[upload_resumable] Chunk at {offset} failed ({e}), retry {failures}/{config.STORAGE_CHUNK_RETRIES}")
+            await asyncio.sleep(min(2 ** (failures - 1), 8))
+            # Resume from whatever the server actually has
+            head = await client.head(upload_url, headers=tus_headers)
+            head.raise_for_status()
+            offset = int(head.headers.get("Upload-Offset", offset))
+
+
+def _place_file(src: str, dest: Path):
+    tmp = dest.with_name(f"{dest.name}.{os.getpid()}.tmp")
+    try:
+        os.link(src, tmp)
+    except OSError:
+        # Different filesystem (or no hardlink support): fall back to a copy
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dest)
+
+
+async def place_local(src: str, dest: Path):
+    """
+    Put a file at dest in local storage, overwriting it.
+
+    Hardlinks when src and dest share a filesystem, so no bytes are copied
+    and the caller still owns (and may delete) src.
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    await asyncio.to_thread(_place_file, src, dest)
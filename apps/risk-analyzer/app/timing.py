@@ -0,0 +1,65 @@
+"""
+Stage timing.
+
+Code marks its internal stages (upload spool, decode, FaceMesh, Praat,
+Hume send, storage upload, ...) with `stage()` blocks or `record()` calls.
+Each measurement goes to the collector of the current request, if one is
+active, and to every registered observer (the /metrics histograms).
+
+Analyzer pool workers are separate processes with no observers: run_in_pool
+collects what a worker recorded and replays it in the API process.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional
+
+_collector: ContextVar[Optional[Dict[str, float]]] = ContextVar("stage_timings", default=None)
+_observers: List[Callable[[str, float], None]] = []
+
+
+def add_observer(observer: Callable[[str, float], None]):
+    """Call observer(stage, seconds) for every stage recorded in this process."""
+    _observers.append(observer)
+
+
+def record(name: str, seconds: float):
+    """Record time spent in a stage."""
+    timings = _collector.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+    for observer in _observers:
+        observer(name, seconds)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the enclosed block as one stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+@contextmanager
+def collect() -> Iterator[Dict[str, float]]:
+    """
+    Collect stage totals (seconds) recorded inside the block.
+
+    Tasks and threads started inside the block inherit the collector, so
+    concurrent branches of one request add to the same totals.
+    """
+    timings: Dict[str, float] = {}
+    token = _collector.set(timings)
+    try:
+        yield timings
+    finally:
+        _collector.reset(token)
+
+
+def replay(timings: Dict[str, float]):
+    """Record stage totals measured elsewhere (e.g. in a pool worker)."""
+    for name, seconds in timings.items():
+        record(name, seconds)
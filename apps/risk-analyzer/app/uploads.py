@@ -0,0 +1,116 @@
+"""
+Upload spooling.
+
+Copies an UploadFile to scratch storage in fixed-size chunks so a request
+never holds a whole recording in memory, whatever its size. Analyzers take
+file paths, so they need a named file. The content hash (for result
+caching) is computed on the way through.
+
+The multipart parser has already written each part over 1 MB to a temp
+file of its own before the endpoint runs. That file is unnamed
+(O_TMPFILE), so it can't be moved or linked into SCRATCH_DIR, and the spool
+is a second copy. The parser's copy goes to the system temp dir (TMPDIR),
+not SCRATCH_DIR. To keep both copies on tmpfs, point TMPDIR at the same
+mount.
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+import uuid
+from typing import NamedTuple, Optional
+
+from fastapi import HTTPException, UploadFile
+
+from app.config import config
+from app.timing import stage
+
+
+class SpooledUpload(NamedTuple):
+    path: str
+    size: int
+    sha256: str
+
+    @classmethod
+    def from_path(cls, path: str) -> "SpooledUpload":
+        """Describe a file that didn't arrive as an upload (e.g. extracted audio)."""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(config.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+        return cls(path, os.path.getsize(path), digest.hexdigest())
+
+
+def scratch_dir() -> Optional[str]:
+    """Directory for spooled uploads (None = system temp dir)."""
+    if config.SCRATCH_DIR:
+        os.makedirs(config.SCRATCH_DIR, exist_ok=True)
+        return config.SCRATCH_DIR
+    return None
+
+
+async def spool_upload(file: UploadFile, max_bytes: Optional[int] = None) -> SpooledUpload:
+    """
+    Stream an upload to a scratch file (in SCRATCH_DIR; the parser's own
+    spill file stays in the system temp dir, see the module docstring).
+
+    Args:
+        file: Incoming multipart file
+        max_bytes: Size limit (default MAX_UPLOAD_BYTES); exceeding it is a 413
+
+    Returns:
+        The scratch file with its size and SHA-256; the caller is
+        responsible for deleting the file
+    """
+    if max_bytes is None:
+        max_bytes = config.MAX_UPLOAD_BYTES
+    suffix = os.path.splitext(file.filename or "")[1]
+
+    with stage("upload_spool"), tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=scratch_dir()) as tmp:
+        tmp_path = tmp.name
+        digest = hashlib.sha256()
+        try:
+            written = 0
+            while True:
+                chunk = await file.read(config.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if max_bytes and written > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Upload exceeds {max_bytes} bytes",
+                    )
+                digest.update(chunk)
+                await asyncio.to_thread(tmp.write, chunk)
+        except BaseException:
+            tmp.close()
+            os.unlink(tmp_path)
+            raise
+
+    return SpooledUpload(tmp_path, written, digest.hexdigest())
+
+
+def link_spooled(path: str) -> Optional[str]:
+    """
+    A second name for a spooled file, next to it and with the same suffix.
+
+    A computation shared between requests reads its own link. The request
+    that spooled the file then deletes only its own name. Nothing is copied.
+
+    Returns:
+        The new path (the caller deletes it), or None where the filesystem
+        has no hardlinks
+    """
+    root, ext = os.path.splitext(path)
+    link = f"{root}-{uuid.uuid4().hex[:8]}{ext}"
+    try:
+        os.link(path, link)
+    except OSError as e:
+        print(f"[uploads] Could not link {path}: {e}")
+        return None
+    return link
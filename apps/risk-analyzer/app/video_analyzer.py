@@ -8,10 +8,22 @@ Extracts:
 - Gaze Direction (future: eye tracking)
 """
 
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Tuple, Iterator, Optional
+
 import cv2
 import mediapipe as mp
 import numpy as np
-from typing import Dict, Any, Tuple
+
+from app.config import config
+from app.media import probe_media
+from app.timing import record, stage
+
+# Bump when the metrics this module produces change (invalidates cached results)
+ANALYZER_VERSION = "1"
 
 # MediaPipe Initialization with Robust Import
 mp_face_mesh = None
@@ -37,60 +49,169 @@ LOWER_LIP_BOTTOM = 14
 LIP_LEFT_CORNER = 61
 LIP_RIGHT_CORNER = 291
 
+# Every landmark the geometry needs, in buffer order: right eye, left eye, lips
+LANDMARK_INDICES = RIGHT_EYE_INDICES + LEFT_EYE_INDICES + [
+    UPPER_LIP_TOP, LOWER_LIP_BOTTOM, LIP_LEFT_CORNER, LIP_RIGHT_CORNER
+]
+RIGHT_EYE_SLICE = slice(0, 6)
+LEFT_EYE_SLICE = slice(6, 12)
+LIP_SLICE = slice(12, 16)
+
+
+class FaceMeshPool:
+    """
+    Long-lived FaceMesh graphs, reused across videos.
 
-def calculate_ear(landmarks, eye_indices: list) -> float:
+    Building a graph (and its first full-frame detection) costs more than
+    analyzing a short segment, so each analyzer worker keeps its graphs warm.
+    A graph is checked out for exactly one video and reset before it goes
+    back, so landmark tracking never carries over between videos.
     """
-    Calculate Eye Aspect Ratio (EAR) for blink detection.
+
+    def __init__(self):
+        self._idle: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def _create(self):
+        with self._lock:
+            self.created += 1
+        return mp_face_mesh.FaceMesh(
+            max_num_faces=1,
+            refine_landmarks=True,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+
+    def warm(self):
+        """Build one graph ahead of the first request (worker start-up)."""
+        if mp_face_mesh is not None and self._idle.empty():
+            self._idle.put(self._create())
+
+    @contextmanager
+    def acquire(self) -> Iterator[Tuple[Any, bool]]:
+        """
+        Check out a graph for one video.
+
+        Yields:
+            Tuple of (face_mesh, reused) where reused is False for a fresh graph
+        """
+        try:
+            face_mesh = self._idle.get_nowait()
+            reused = True
+            with self._lock:
+                self.reused += 1
+        except queue.Empty:
+            face_mesh = self._create()
+            reused = False
+
+        try:
+            yield face_mesh, reused
+        except BaseException:
+            # Graph state is unknown after a failure; don't hand it out again.
+            face_mesh.close()
+            raise
+        face_mesh.reset()
+        self._idle.put(face_mesh)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"created": self.created, "reused": self.reused}
+
+
+# One pool per analyzer worker process
+face_mesh_pool = FaceMeshPool()
+
+
+def extract_landmarks(landmarks, out: np.ndarray):
+    """
+    Copy the 16 landmarks used for EAR and lip tension into out[16, 2].
+    Called once per analyzed frame; everything else is computed per video.
+    """
+    out[:] = [(landmarks[i].x, landmarks[i].y) for i in LANDMARK_INDICES]
+
+
+def calculate_ear_series(eye_points: np.ndarray) -> np.ndarray:
+    """
+    Calculate Eye Aspect Ratio (EAR) for blink detection, for every frame at once.
     EAR = (|p2-p6| + |p3-p5|) / (2 * |p1-p4|)
     Low EAR (< 0.2) indicates a blink.
+
+    Args:
+        eye_points: (frames, 6, 2) eye landmarks in RIGHT/LEFT_EYE_INDICES order
+
+    Returns:
+        (frames,) EAR values; 0.0 where the eye width is zero
     """
-    # Get the 6 eye points
-    p = [landmarks[i] for i in eye_indices]
-    
     # Vertical distances
-    v1 = np.linalg.norm(np.array([p[1].x, p[1].y]) - np.array([p[5].x, p[5].y]))
-    v2 = np.linalg.norm(np.array([p[2].x, p[2].y]) - np.array([p[4].x, p[4].y]))
-    
+    v1 = np.linalg.norm(eye_points[:, 1] - eye_points[:, 5], axis=-1)
+    v2 = np.linalg.norm(eye_points[:, 2] - eye_points[:, 4], axis=-1)
+
     # Horizontal distance
-    h = np.linalg.norm(np.array([p[0].x, p[0].y]) - np.array([p[3].x, p[3].y]))
-    
-    if h == 0:
-        return 0.0
-    
-    ear = (v1 + v2) / (2.0 * h)
+    h = np.linalg.norm(eye_points[:, 0] - eye_points[:, 3], axis=-1)
+
+    ear = np.zeros_like(h)
+    np.divide(v1 + v2, 2.0 * h, out=ear, where=h != 0)
     return ear
 
 
-def calculate_lip_tension(landmarks) -> float:
+def calculate_lip_tension_series(lip_points: np.ndarray) -> np.ndarray:
     """
-    Calculate lip tension based on vertical compression.
+    Calculate lip tension based on vertical compression, for every frame at once.
     Lower values = more compressed lips (potential stress or suppression).
+
+    Args:
+        lip_points: (frames, 4, 2) as upper top, lower bottom, left corner, right corner
+
+    Returns:
+        (frames,) tension ratios; 0.0 where the lip width is zero
     """
-    upper = landmarks[UPPER_LIP_TOP]
-    lower = landmarks[LOWER_LIP_BOTTOM]
-    left = landmarks[LIP_LEFT_CORNER]
-    right = landmarks[LIP_RIGHT_CORNER]
-    
     # Vertical lip opening
-    vertical = np.linalg.norm(np.array([upper.x, upper.y]) - np.array([lower.x, lower.y]))
-    
+    vertical = np.linalg.norm(lip_points[:, 0] - lip_points[:, 1], axis=-1)
+
     # Horizontal lip width
-    horizontal = np.linalg.norm(np.array([left.x, left.y]) - np.array([right.x, right.y]))
-    
-    if horizontal == 0:
-        return 0.0
-    
+    horizontal = np.linalg.norm(lip_points[:, 2] - lip_points[:, 3], axis=-1)
+
     # Tension ratio: lower value = more compressed
-    tension = vertical / horizontal
+    tension = np.zeros_like(horizontal)
+    np.divide(vertical, horizontal, out=tension, where=horizontal != 0)
     return tension
 
 
-def analyze_video(video_path: str) -> Dict[str, Any]:
+def detect_blinks(ear: np.ndarray, timestamps: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    Find completed blinks in an EAR series.
+
+    A blink starts on the first sample below threshold and completes on the
+    next sample at or above it; a blink still open at the end is not counted.
+
+    Args:
+        ear: (samples,) EAR per analyzed frame
+        timestamps: (samples,) presentation time of each frame in seconds
+        threshold: EAR below which the eyes count as closed
+
+    Returns:
+        Blink durations in ms, one per completed blink
+    """
+    closed = ear < threshold
+    was_closed = np.concatenate(([False], closed[:-1]))
+    starts = np.flatnonzero(closed & ~was_closed)
+    ends = np.flatnonzero(~closed & was_closed)
+    # Every end is preceded by its start; a trailing start has no end yet.
+    return (timestamps[ends] - timestamps[starts[:len(ends)]]) * 1000
+
+
+def analyze_video(video_path: str, sample_rate_hz: Optional[float] = None) -> Dict[str, Any]:
     """
     Analyze a video file for visual risk indicators.
     
     Args:
         video_path: Path to the video file (.mp4, .webm, etc.)
+        sample_rate_hz: Frames per second of video time to analyze (default
+            VIDEO_SAMPLE_RATE_HZ). Frames in between are still decoded
+            (grab()), but skip the BGR conversion, the copy and FaceMesh.
+            0 analyzes every frame.
     
     Returns:
         Dictionary containing risk metrics
@@ -99,13 +220,22 @@ def analyze_video(video_path: str) -> Dict[str, Any]:
     
     if not cap.isOpened():
         raise ValueError(f"Could not open video: {video_path}")
-    
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    total_frames_raw = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+
+    # Container header first (no decode). OpenCV's own metadata is only the
+    # fallback: many webcams report 0 or garbage FPS/frame counts in webm.
+    probe = probe_media(video_path)
+    fps = probe["fps"] if probe else 0.0
+    total_frames = probe["frame_count"] if probe else 0
+    duration_seconds = probe["duration_s"] if probe else 0.0
+    duration_from_container = duration_seconds > 0
+
+    if not fps:
+        fps = cap.get(cv2.CAP_PROP_FPS)
     metadata_valid = True
 
     try:
-        total_frames = int(total_frames_raw)
+        if not total_frames:
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         if total_frames < 0 or total_frames > 100000:  # Max 100k frames (~1 hr at 30fps)
             metadata_valid = False
             total_frames = 0
@@ -113,13 +243,13 @@ def analyze_video(video_path: str) -> Dict[str, Any]:
         metadata_valid = False
         total_frames = 0
     
-    # Validate FPS - many webcams report 0 or garbage in webm
+    # Validate FPS
     if fps <= 0 or fps > 240:
         print(f"WARNING: Invalid FPS from metadata ({fps}). Defaulting to 30.0")
         fps = 30.0
     
-    duration_seconds = total_frames / fps if (metadata_valid and total_frames > 0) else 0.0
-    cap.release()
+    if not duration_from_container:
+        duration_seconds = total_frames / fps if (metadata_valid and total_frames > 0) else 0.0
 
 
     EAR_THRESHOLD = 0.21
@@ -127,6 +257,7 @@ def analyze_video(video_path: str) -> Dict[str, Any]:
     # If MediaPipe is unavailable, return empty/error result as requested
     if mp_face_mesh is None:
         print("ERROR: MediaPipe unavailable. Returning empty analysis.")
+        cap.release()
         return {
             "blink_count": 0,
             "blink_rate_per_min": 0,
@@ -135,11 +266,11 @@ def analyze_video(video_path: str) -> Dict[str, Any]:
             "avg_ear": 0,
             "duration_s": round(duration_seconds, 2),
             "frames_analyzed": 0,
+            "facemesh_graph": None,
             "analysis_type": "error_mediapipe_unavailable"
         }
 
-    # REAL ANALYSIS
-    cap = cv2.VideoCapture(video_path) # Re-open
+    # REAL ANALYSIS (same capture; nothing has been decoded yet)
     
     # Skip length check if metadata is missing/suspicious, we'll check after processing
     if metadata_valid and (total_frames < 5 or duration_seconds < 0.5):
@@ -149,40 +280,79 @@ def analyze_video(video_path: str) -> Dict[str, Any]:
              "blink_count": 0, "blink_rate_per_min": 0, "avg_blink_duration_ms": 0,
              "avg_lip_tension": 0, "avg_ear": 0, "duration_s": round(duration_seconds, 2), 
              "frames_analyzed": 0,
+             "facemesh_graph": None,
              "analysis_type": "error_video_too_short"
         }
 
-    blink_count = 0
-    blink_durations = []
-    lip_tensions = []
-    ear_values = []
-    
-    in_blink = False
-    blink_start_frame = 0
+    if sample_rate_hz is None:
+        sample_rate_hz = config.VIDEO_SAMPLE_RATE_HZ
+    sample_interval = 1.0 / sample_rate_hz if sample_rate_hz > 0 else 0.0
+    # Frame timestamps jitter; accept a frame up to half a frame period early.
+    sample_tolerance = 0.5 / fps
+
+    # Landmarks for every analyzed frame with a face, filled during decode;
+    # the geometry runs once over the whole buffer afterwards.
+    if metadata_valid and sample_interval > 0:
+        capacity = int(duration_seconds / sample_interval) + 2
+    elif metadata_valid:
+        capacity = total_frames + 1
+    else:
+        capacity = 1024
+    points = np.empty((capacity, len(LANDMARK_INDICES), 2), dtype=np.float32)
+    point_times = np.empty(capacity, dtype=np.float64)
+    face_frames = 0
+
+    frame_count = 0
+    frames_sampled = 0
+    next_sample_time = 0.0
+    last_timestamp = -1.0
+    graph_reused = None
+    decode_s = 0.0
+    convert_s = 0.0
+    facemesh_s = 0.0
     
     try:
-        with mp_face_mesh.FaceMesh(
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        ) as face_mesh:
+        with face_mesh_pool.acquire() as (face_mesh, graph_reused):
             
-            frame_count = 0
             while cap.isOpened():
-                success, frame = cap.read()
-                if not success:
+                # grab() demuxes and decodes (OpenCV's FFmpeg backend);
+                # retrieve() then converts to BGR and copies the frame out,
+                # which, like FaceMesh, only sampled frames pay for.
+                t0 = time.perf_counter()
+                grabbed = cap.grab()
+                decode_s += time.perf_counter() - t0
+                if not grabbed:
                     break
                 
                 frame_count += 1
-                
-                # Process every 3rd frame for performance
-                if frame_count % 3 != 0:
+
+                # Container timestamp of the grabbed frame; fall back to the
+                # nominal frame clock when the stream has no usable PTS.
+                timestamp = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+                if timestamp <= last_timestamp:
+                    timestamp = (frame_count - 1) / fps
+                last_timestamp = timestamp
+
+                if timestamp < next_sample_time - sample_tolerance:
+                    continue
+                next_sample_time += sample_interval
+                if next_sample_time < timestamp:
+                    # Catch up after a gap instead of sampling a burst.
+                    next_sample_time = timestamp + sample_interval
+
+                t0 = time.perf_counter()
+                success, frame = cap.retrieve()
+                if not success:
+                    convert_s += time.perf_counter() - t0
                     continue
+                frames_sampled += 1
                 
                 # Convert to RGB
                 rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                t1 = time.perf_counter()
+                convert_s += t1 - t0
                 results = face_mesh.process(rgb_frame)
+                facemesh_s += time.perf_counter() - t1
                 
                 if results and results.multi_face_landmarks:
                     # Get landmarks for the first face detected
@@ -190,44 +360,44 @@ def analyze_video(video_path: str) -> Dict[str, Any]:
                     landmarks = face_landmarks.landmark
                     
                     if landmarks:
-                        # Calculate EAR for both eyes
-                        left_ear = calculate_ear(landmarks, LEFT_EYE_INDICES)
-                        right_ear = calculate_ear(landmarks, RIGHT_EYE_INDICES)
-                        avg_ear = (left_ear + right_ear) / 2
-                        ear_values.append(avg_ear)
-                        
-                        # Blink detection
-                        if avg_ear < EAR_THRESHOLD:
-                            if not in_blink:
-                                in_blink = True
-                                blink_start_frame = frame_count
-                        else:
-                            if in_blink:
-                                in_blink = False
-                                blink_count += 1
-                                blink_duration_frames = frame_count - blink_start_frame
-                                blink_duration_ms = (blink_duration_frames / fps) * 1000 if fps > 0 else 0
-                                blink_durations.append(blink_duration_ms)
-                        
-                        # Lip tension
-                        tension = calculate_lip_tension(landmarks)
-                        lip_tensions.append(tension)
+                        if face_frames == capacity:
+                            capacity *= 2
+                            points = np.resize(points, (capacity, *points.shape[1:]))
+                            point_times = np.resize(point_times, capacity)
+                        extract_landmarks(landmarks, points[face_frames])
+                        point_times[face_frames] = timestamp
+                        face_frames += 1
 
     except Exception as e:
         print(f"ERROR during FaceMesh processing: {e}")
     finally:
         cap.release()
+        record("decode", decode_s)
+        record("frame_convert", convert_s)
+        record("facemesh", facemesh_s)
     
-    # Calculate final metrics using actual frame count if metadata was missing
-    if frame_count > 0:
+    # Without a container duration, count the frames we actually walked
+    if frame_count > 0 and not duration_from_container:
         duration_seconds = frame_count / fps
-        
+
+    # Landmarks are float32 already; do the geometry in float64 like the
+    # per-frame version did so thresholds behave identically.
+    with stage("landmark_geometry"):
+        landmark_points = points[:face_frames].astype(np.float64)
+        ear_values = (
+            calculate_ear_series(landmark_points[:, LEFT_EYE_SLICE])
+            + calculate_ear_series(landmark_points[:, RIGHT_EYE_SLICE])
+        ) / 2
+        lip_tensions = calculate_lip_tension_series(landmark_points[:, LIP_SLICE])
+        blink_durations = detect_blinks(ear_values, point_times[:face_frames], EAR_THRESHOLD)
+    blink_count = len(blink_durations)
+
     duration_minutes = duration_seconds / 60 if duration_seconds > 0 else 1.0/60.0
     blink_rate = blink_count / duration_minutes  # blinks per minute
-    
-    avg_blink_duration = float(np.mean(blink_durations)) if blink_durations else 0.0
-    avg_lip_tension = float(np.mean(lip_tensions)) if lip_tensions else 0.0
-    avg_ear = float(np.mean(ear_values)) if ear_values else 0.0
+
+    avg_blink_duration = float(np.mean(blink_durations)) if blink_count else 0.0
+    avg_lip_tension = float(np.mean(lip_tensions)) if face_frames else 0.0
+    avg_ear = float(np.mean(ear_values)) if face_frames else 0.0
     
     return {
         "blink_count": blink_count,
@@ -236,6 +406,8 @@ def analyze_video(video_path: str) -> Dict[str, Any]:
         "avg_lip_tension": round(avg_lip_tension, 4),
         "avg_ear": round(avg_ear, 4),
         "duration_s": round(duration_seconds, 2),
-        "frames_analyzed": frame_count // 3,
+        "frames_analyzed": frames_sampled,
+        "sample_rate_hz": round(frames_sampled / duration_seconds, 2) if duration_seconds > 0 else 0.0,
+        "facemesh_graph": None if graph_reused is None else ("reused" if graph_reused else "created"),
         "analysis_type": "real_mediapipe"
     }
@@ -0,0 +1,14 @@
+"""
+Offline benchmarks for the risk analyzer.
+
+Run from apps/risk-analyzer:
+
+    python -m bench.analyzers            # time the analyzers, compare with the baseline
+    python -m bench.expression           # /analyze-expression throughput against a Hume stand-in
+    python -m bench.segments             # video-service segment fan-out load test
+
+Fixtures (voiced WAVs, rendered face videos, Hume stream payloads) are
+generated deterministically on first use, and Hume is replaced by a local
+stand-in (bench.fake_hume), so nothing needs a network, a Hume key or
+sample recordings.
+"""
@@ -0,0 +1,217 @@
+"""
+Analyzer benchmarks.
+
+Times analyze_audio, analyze_video, calculate_risk_score,
+HumeAnalyzer._extract_from_stream_results and generate_consent_form across
+input sizes, writes latency percentiles, throughput and peak RSS to JSON,
+and compares them with a stored baseline (exit status 1 on regression).
+
+    python -m bench.analyzers --update-baseline    # first run on a box, or after an intended change
+    python -m bench.analyzers                      # full run, compared with the baseline
+    python -m bench.analyzers --quick --only audio,video
+    python -m bench.analyzers --sample-video clip.mp4   # real faces instead of rendered ones
+
+Baselines are machine-specific, so none is committed: record one on the
+reference box and compare runs from that box only. Without a baseline the
+run still writes its results but exits with status 2, so a regression gate
+can't pass by never comparing.
+"""
+
+import argparse
+import functools
+import os
+import sys
+from typing import Any, Callable, Dict, List, Tuple
+
+from bench import fixtures
+from bench.harness import (
+    Case, compare, format_comparison, load_json, run_cases, write_json,
+)
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FIXTURES = os.path.join(BENCH_DIR, ".fixtures")
+DEFAULT_OUT = os.path.join(BENCH_DIR, "results", "analyzers.json")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baselines", "analyzers.json")
+
+Setup = Tuple[Callable[..., Any], Tuple[Any, ...]]
+
+
+# --- Worker-side setups (called in the case's own process) -----------------
+
+def setup_audio(path: str) -> Setup:
+    from app.audio_analyzer import analyze_audio
+    return analyze_audio, (path,)
+
+
+def setup_video(path: str, sample_rate_hz: float) -> Setup:
+    from app.video_analyzer import analyze_video
+    return analyze_video, (path, sample_rate_hz)
+
+
+def setup_fusion() -> Setup:
+    from app.fusion import calculate_risk_score
+    audio = {
+        "jitter_percent": 1.42, "shimmer_percent": 4.1, "pitch_sd_hz": 31.5,
+        "mean_pitch_hz": 142.0, "hnr_db": 9.8, "duration_s": 30.0,
+        "intensity_db": 68.0, "is_noise_only": False,
+    }
+    video = {"blink_rate_per_min": 29.0, "avg_lip_tension": 0.31, "duration_s": 30.0}
+    baseline = {"jitter": 0.8, "pitch_sd": 15.0, "blink_rate": 17.0, "lip_tension": 0.45}
+    return calculate_risk_score, (audio, video, baseline)
+
+
+def setup_stream_extract(face_frames: int, prosody_utterances: int) -> Setup:
+    from hume.core.pydantic_utilities import parse_obj_as
+    from hume.expression_measurement.stream import SubscribeEvent
+    from app.hume_analyzer import HumeAnalyzer
+
+    # Parsed into SDK models, as send_file() hands them to the analyzer
+    payload = fixtures.stream_predictions(face_frames, prosody_utterances)
+    results = [parse_obj_as(SubscribeEvent, payload)]
+    # The extractor uses no instance state; skip the constructor (needs HUME_API_KEY)
+    extract = functools.partial(HumeAnalyzer._extract_from_stream_results, None)
+    return extract, (results, "face")
+
+
+def _render_consent(data: Dict[str, Any]):
+    from app.pdf_generator import generate_consent_form
+    os.unlink(generate_consent_form(data))
+
+
+def setup_consent_pdf() -> Setup:
+    return _render_consent, (fixtures.consent_data(),)
+
+
+# --- Case matrix -----------------------------------------------------------
+
+def audio_cases(fixture_dir: str, quick: bool) -> List[Case]:
+    cases = [
+        Case(
+            "audio/sine-5s", "bench.analyzers:setup_audio",
+            {"path": fixtures.ensure(fixture_dir, "sine-5s.wav", fixtures.sine_wav, 5.0)},
+            repeat=5, media_seconds=5.0,
+        )
+    ]
+    for seconds in ((5, 30) if quick else (5, 30, 120)):
+        path = fixtures.ensure(fixture_dir, f"voiced-{seconds}s.wav", fixtures.voiced_wav, float(seconds))
+        cases.append(Case(
+            f"audio/voiced-{seconds}s", "bench.analyzers:setup_audio", {"path": path},
+            repeat=3 if seconds >= 120 or quick else 5, media_seconds=float(seconds),
+        ))
+    return cases
+
+
+def video_cases(fixture_dir: str, quick: bool, sample_video: str = None) -> List[Case]:
+    seconds = 5.0 if quick else 10.0
+    sizes = fixtures.VIDEO_SIZES[:2] if quick else fixtures.VIDEO_SIZES
+    rates = (30,) if quick else (15, 30)
+    kind = "sample" if sample_video else "face"
+
+    cases = []
+    for label, width, height in sizes:
+        for fps in rates:
+            name = f"{kind}-{label}-{fps}fps-{seconds:g}s.mp4"
+            if sample_video:
+                path = fixtures.ensure(
+                    fixture_dir, name, functools.partial(fixtures.resample_video, sample_video),
+                    seconds, width, height, fps,
+                )
+            else:
+                path = fixtures.ensure(fixture_dir, name, fixtures.face_video, seconds, width, height, fps)
+            cases.append(Case(
+                f"video/{kind}-{label}-{fps}fps", "bench.analyzers:setup_video",
+                {"path": path, "sample_rate_hz": 10.0},
+                repeat=3, media_seconds=seconds,
+            ))
+    return cases
+
+
+def fusion_cases(quick: bool) -> List[Case]:
+    return [Case("fusion/calculate_risk_score", "bench.analyzers:setup_fusion", {}, repeat=10, number=2000)]
+
+
+def hume_cases(quick: bool) -> List[Case]:
+    # ~3 fps face sampling: 10 s, 2 min and 20 min of video
+    sizes = ((30, 3), (360, 40)) if quick else ((30, 3), (360, 40), (3600, 400))
+    return [
+        Case(
+            f"hume/extract-{frames}f-{utterances}u", "bench.analyzers:setup_stream_extract",
+            {"face_frames": frames, "prosody_utterances": utterances},
+            repeat=5, number=max(1, 300 // frames),
+        )
+        for frames, utterances in sizes
+    ]
+
+
+def pdf_cases(quick: bool) -> List[Case]:
+    return [Case("pdf/generate_consent_form", "bench.analyzers:setup_consent_pdf", {}, repeat=5 if quick else 10)]
+
+
+GROUPS = ("audio", "video", "fusion", "hume", "pdf")
+
+
+def build_cases(groups: List[str], fixture_dir: str, quick: bool, sample_video: str = None) -> List[Case]:
+    cases: List[Case] = []
+    if "audio" in groups:
+        cases += audio_cases(fixture_dir, quick)
+    if "video" in groups:
+        cases += video_cases(fixture_dir, quick, sample_video)
+    if "fusion" in groups:
+        cases += fusion_cases(quick)
+    if "hume" in groups:
+        cases += hume_cases(quick)
+    if "pdf" in groups:
+        cases += pdf_cases(quick)
+    return cases
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the risk analyzers (offline).")
+    parser.add_argument("--only", default=",".join(GROUPS), help=f"Comma-separated groups: {', '.join(GROUPS)}")
+    parser.add_argument("--quick", action="store_true", help="Fewer sizes and repeats (smoke run)")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="Fixture directory (generated on first use)")
+    parser.add_argument("--sample-video", help="Recorded video to resample instead of the rendered face")
+    parser.add_argument("--out", default=DEFAULT_OUT, help="Results JSON")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="Write this run's results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p50 latency growth (0.25 = +25%%)")
+    parser.add_argument("--rss-tolerance", type=float, default=0.25, help="Allowed peak RSS growth")
+    args = parser.parse_args(argv)
+
+    groups = [g.strip() for g in args.only.split(",") if g.strip()]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        parser.error(f"Unknown group(s): {', '.join(sorted(unknown))}")
+
+    print(f"[bench] Preparing fixtures in {args.fixtures}")
+    cases = build_cases(groups, args.fixtures, args.quick, args.sample_video)
+    document = run_cases(cases)
+    document["meta"]["quick"] = args.quick
+    write_json(args.out, document)
+    print(f"[bench] Wrote {args.out}")
+
+    if args.update_baseline:
+        write_json(args.baseline, document)
+        print(f"[bench] Updated baseline {args.baseline}")
+        return 0
+
+    baseline = load_json(args.baseline)
+    if baseline is None:
+        print(
+            f"[bench] No baseline at {args.baseline}; nothing was compared. "
+            f"Run with --update-baseline on this machine to record one",
+            file=sys.stderr,
+        )
+        return 2
+
+    rows, regressions = compare(document, baseline, args.tolerance, args.rss_tolerance)
+    print(format_comparison(rows))
+    if regressions:
+        print(f"[bench] {len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    print("[bench] No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
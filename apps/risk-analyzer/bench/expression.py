@@ -0,0 +1,184 @@
+"""
+Expression (HumeAnalyzer) throughput benchmark.
+
+Starts the Hume stand-in and the app against it, then drives
+POST /analyze-expression at each concurrency level and reports requests per
+second, latency percentiles and queueing: time waiting for an admission slot
+(expression_admission_wait) and for a Hume socket (hume_socket_wait), as
+opposed to talking to Hume (hume_send). Stage times come from the app's
+/metrics histograms, read before and after each level, so requests go out
+unprofiled. With --profile, requests also carry profile=true and each one's
+total queueing and HTTP overhead are reported.
+
+    python -m bench.expression --concurrency 1,4,8,16
+    python -m bench.expression --concurrency 8 --profile        # + per-request queueing
+    python -m bench.expression --concurrency 8 --pool-size 8 --hume-latency-ms 1500
+    python -m bench.expression --hume-no-audio-rate 0.2 --hume-drop-rate 0.05
+    python -m bench.expression --app-url http://127.0.0.1:8000   # an app already running
+
+Numbers measure this service's overhead and queueing against a Hume of the
+configured latency, not Hume itself.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+from typing import Any, Dict, List
+
+import httpx
+
+from bench import fixtures, servers
+from bench.fake_hume import add_arguments, settings_from_args
+from bench.harness import environment, write_json
+from bench.load import (
+    RequestResult, latency_summary, post_file, run_closed_loop, stage_histograms, stage_summary,
+    summarize_requests, unique_body,
+)
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FIXTURES = os.path.join(BENCH_DIR, ".fixtures")
+DEFAULT_OUT = os.path.join(BENCH_DIR, "results", "expression.json")
+
+QUEUE_STAGES = ("expression_admission_wait", "hume_socket_wait")
+
+
+async def _send(
+    client: httpx.AsyncClient, video: bytes, filename: str, no_audio: bool, profile: bool,
+) -> RequestResult:
+    return await post_file(
+        client, "/analyze-expression", {"sessionId": "bench", "noAudio": str(no_audio).lower()},
+        (filename, video, "video/mp4"), is_empty=lambda metrics: not metrics.get("emotion_count"),
+        profile=profile,
+    )
+
+
+async def run_level(
+    app_url: str, video: bytes, filename: str, concurrency: int, requests: int, no_audio: bool,
+    identical: bool = False, profile: bool = False,
+) -> Dict[str, Any]:
+    """One concurrency level; returns summarize_requests() plus stage waits and the socket pool stats."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=app_url, timeout=300.0, limits=limits) as client:
+        # Warm up: open Hume sockets and pool workers before timing
+        await asyncio.gather(*(
+            _send(client, unique_body(video, -1 - i), filename, no_audio, profile) for i in range(concurrency)
+        ))
+        before = (await client.get("/stats")).json().get("hume_socket_pool", {})
+        stages_before = await stage_histograms(client)
+        run = await run_closed_loop(
+            lambda i: _send(client, video if identical else unique_body(video, i), filename, no_audio, profile),
+            requests, concurrency,
+        )
+        after = (await client.get("/stats")).json().get("hume_socket_pool", {})
+        stages_after = await stage_histograms(client)
+
+    summary = summarize_requests(run["results"], run["wall_s"])
+    # Per wait (a chunked video checks out one socket per chunk), profiled or not
+    summary["stage_waits_ms"] = {
+        name: stage_summary(stages_before, stages_after, name) for name in (*QUEUE_STAGES, "hume_send")
+    }
+    # Per request, from the profile breakdown (--profile only)
+    ok = [r for r in run["results"] if r.status == 200 and r.server_ms is not None]
+    summary["queue_ms"] = latency_summary([sum(r.stages_ms.get(s, 0.0) for s in QUEUE_STAGES) / 1000 for r in ok])
+    summary["hume_send_ms"] = latency_summary([r.stages_ms.get("hume_send", 0.0) / 1000 for r in ok])
+    # Client latency the server's profile doesn't cover: HTTP, multipart parsing, event-loop lag
+    summary["overhead_ms"] = latency_summary([max(0.0, r.latency_s - r.server_ms / 1000) for r in ok])
+    summary["socket_pool"] = {
+        key: after.get(key, 0) - before.get(key, 0) for key in ("opened", "reconnects", "discarded", "waited")
+    }
+    summary["socket_pool"]["max_size"] = after.get("max_size")
+    return summary
+
+
+def format_levels(results: Dict[str, Dict[str, Any]]) -> str:
+    lines = [
+        f"{'concurrency':>11} {'rps':>7} {'p50 ms':>9} {'p99 ms':>9} {'admit p50':>10} {'admit p99':>10} "
+        f"{'socket p50':>10} {'socket p99':>10} {'send p50':>9} {'errors':>7} {'empty':>6}"
+    ]
+    def ms(summary: Dict[str, float], key: str, width: int) -> str:
+        # Blank when the stage wasn't observed at this level
+        return f"{summary[key]:>{width}.1f}" if summary else f"{'-':>{width}}"
+
+    for level, r in results.items():
+        lat, waits = r["latency_ms"] or {}, r["stage_waits_ms"]
+        admit, socket, send = (waits[name] for name in (*QUEUE_STAGES, "hume_send"))
+        lines.append(
+            f"{level:>11} {r['throughput_rps'] or 0:>7.2f} {lat.get('p50', 0):>9.1f} {lat.get('p99', 0):>9.1f} "
+            f"{ms(admit, 'p50', 10)} {ms(admit, 'p99', 10)} {ms(socket, 'p50', 10)} {ms(socket, 'p99', 10)} "
+            f"{ms(send, 'p50', 9)} {r['error_rate'] or 0:>7.1%} {r['empty_rate'] or 0:>6.1%}"
+        )
+    return "\n".join(lines)
+
+
+async def run_levels(args, app_url: str, video: bytes, filename: str) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    for concurrency in args.concurrency:
+        requests = args.requests or max(20, 5 * concurrency)
+        print(f"[bench] expression: {requests} requests at concurrency {concurrency} ...")
+        results[str(concurrency)] = await run_level(
+            app_url, video, filename, concurrency, requests, args.no_audio, args.identical, args.profile,
+        )
+    return results
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark /analyze-expression against the Hume stand-in.")
+    parser.add_argument("--concurrency", default="1,4,8,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=0, help="Requests per level (default max(20, 5 x concurrency))")
+    parser.add_argument("--video", help="Video to upload (default: a rendered 10 s 360p face)")
+    parser.add_argument("--no-audio", action="store_true", help="Send noAudio=true (face only)")
+    parser.add_argument(
+        "--identical", action="store_true",
+        help="Upload the same bytes every time (concurrent requests then coalesce)",
+    )
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="Also send profile=true and report queueing / overhead per request (adds server-side timing work)",
+    )
+    parser.add_argument("--pool-size", type=int, help="HUME_STREAM_POOL_SIZE for the app")
+    parser.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE", help="Extra app setting")
+    parser.add_argument("--app-url", help="Benchmark an app that is already running (ignores --hume-*)")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="Fixture directory")
+    parser.add_argument("--out", default=DEFAULT_OUT, help="Results JSON")
+    add_arguments(parser, prefix="hume-")
+    args = parser.parse_args(argv)
+    args.concurrency = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+    video_path = args.video or fixtures.ensure(
+        args.fixtures, "face-360p-30fps-10s.mp4", fixtures.face_video, 10.0, 640, 360, 30,
+    )
+    with open(video_path, "rb") as f:
+        video = f.read()
+    filename = os.path.basename(video_path)
+
+    settings = settings_from_args(args, prefix="hume-")
+    app_env = dict(item.split("=", 1) for item in args.app_env)
+    if args.pool_size:
+        app_env["HUME_STREAM_POOL_SIZE"] = str(args.pool_size)
+
+    with contextlib.ExitStack() as stack:
+        app_url = args.app_url
+        if app_url is None:
+            hume_url = stack.enter_context(servers.fake_hume(settings))
+            app_url = stack.enter_context(servers.analyzer_app(hume_url, app_env))
+        results = asyncio.run(run_levels(args, app_url, video, filename))
+
+    meta = environment()
+    meta.update({
+        "video": filename,
+        "video_bytes": len(video),
+        "profile": args.profile,
+        "app_url": args.app_url,
+        "app_env": app_env,
+        "hume": None if args.app_url else settings._asdict(),
+    })
+    write_json(args.out, {"meta": meta, "results": results})
+    print(format_levels(results))
+    print(f"[bench] Wrote {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+"""
+Offline Hume stand-in.
+
+Speaks enough of Hume's expression-measurement API for the analyzer to run
+against it with HUME_BASE_URL pointed here:
+
+- ws  /v0/stream/models                  send_file(): face / prosody predictions
+- POST /v0/batch/jobs                     start_inference_job()
+- GET  /v0/batch/jobs/{id}                get_job_details()
+- GET  /v0/batch/jobs/{id}/predictions    get_job_predictions()
+
+Responses carry 48-dim emotion vectors (bench.fixtures), seeded from the
+file contents so the same file always gets the same scores. Latency, error
+codes (e.g. E0102, prosody requested for a video without audio) and dropped
+connections are injected at configurable rates, to exercise the socket
+pool's reconnect path and the face-only fallback.
+
+    python -m bench.fake_hume --port 8765 --latency-ms 400 --no-audio-rate 0.1
+    HUME_BASE_URL=http://127.0.0.1:8765 HUME_API_KEY=offline uvicorn app.main:app
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import cv2
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+
+from bench import fixtures
+
+
+class FakeHumeSettings(NamedTuple):
+    latency_ms: float = 400.0  # per stream request, before the per-MB part
+    jitter_ms: float = 100.0  # uniform +/- on top
+    per_mb_ms: float = 60.0  # extra latency per MB of payload
+    face_fps: float = 3.0  # face predictions per second of video
+    prosody_seconds: float = 2.5  # seconds of speech per prosody prediction
+    no_audio_rate: float = 0.0  # video requests asking for prosody that get E0102
+    error_rate: float = 0.0  # requests answered with an injected error
+    error_code: str = "E0300"
+    drop_rate: float = 0.0  # requests whose connection is closed without a reply
+    batch_latency_ms: float = 3000.0  # until a batch job reports COMPLETED
+    batch_error_rate: float = 0.0  # files in a batch job that fail
+    seed: int = 0
+
+
+def _media_seconds(data: bytes) -> float:
+    """Duration of a media payload (OpenCV reads the header; audio-only files fall back to 5 s)."""
+    with tempfile.NamedTemporaryFile(suffix=".bin", delete=False) as tmp:
+        tmp.write(data)
+    try:
+        cap = cv2.VideoCapture(tmp.name)
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        frames = cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0.0
+        cap.release()
+    finally:
+        os.unlink(tmp.name)
+    if fps > 0 and frames > 0:
+        return frames / fps
+    return 5.0
+
+
+def _file_seed(data: bytes) -> int:
+    return int.from_bytes(hashlib.sha256(data).digest()[:4], "big")
+
+
+def stream_response(settings: FakeHumeSettings, data: bytes, models: Dict[str, Any]) -> Dict[str, Any]:
+    """Stream predictions for the requested models."""
+    seconds = _media_seconds(data)
+    face_frames = max(1, int(seconds * settings.face_fps)) if "face" in models else 0
+    utterances = max(1, int(seconds / settings.prosody_seconds)) if "prosody" in models else 0
+    response = fixtures.stream_predictions(face_frames, utterances, settings.face_fps, seed=_file_seed(data))
+    if "face" not in models:
+        del response["face"]
+    return response
+
+
+def _batch_predictions(settings: FakeHumeSettings, url: str, models: Dict[str, Any], rng: random.Random) -> Dict[str, Any]:
+    """One entry of get_job_predictions() for a URL."""
+    source = {"type": "url", "url": url}
+    if rng.random() < settings.batch_error_rate:
+        return {"source": source, "results": None, "error": "Failed to fetch media from URL"}
+
+    seed = _file_seed(url.encode())
+    stream = fixtures.stream_predictions(
+        15 if "face" in models else 0, 4 if "prosody" in models else 0, settings.face_fps, seed=seed,
+    )
+    predictions: Dict[str, Any] = {}
+    if "face" in models:
+        face = [
+            {key: value for key, value in p.items() if key not in ("bbox", "face_id")} | {"box": p["bbox"]}
+            for p in stream["face"]["predictions"]
+        ]
+        predictions["face"] = {"metadata": None, "grouped_predictions": [{"id": "face_0", "predictions": face}]}
+    if "prosody" in models:
+        prosody = [
+            {"text": None, "confidence": 0.93, "speaker_confidence": None, **p}
+            for p in stream["prosody"]["predictions"]
+        ]
+        predictions["prosody"] = {"metadata": None, "grouped_predictions": [{"id": "unknown", "predictions": prosody}]}
+
+    return {
+        "source": source,
+        "results": {
+            "predictions": [{"file": os.path.basename(url.split("?")[0]) or "media", "models": predictions}],
+            "errors": [],
+        },
+        "error": None,
+    }
+
+
+def create_app(settings: FakeHumeSettings) -> FastAPI:
+    """The stand-in as an ASGI app (run it with uvicorn)."""
+    app = FastAPI(title="Fake Hume")
+    rng = random.Random(settings.seed)
+    jobs: Dict[str, Dict[str, Any]] = {}
+    counters = {"stream_requests": 0, "errors": 0, "no_audio": 0, "dropped": 0, "connections": 0, "batch_jobs": 0}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy", "service": "fake-hume", **counters}
+
+    @app.websocket("/v0/stream/models")
+    async def stream_models(websocket: WebSocket):
+        await websocket.accept()
+        counters["connections"] += 1
+        try:
+            while True:
+                payload = json.loads(await websocket.receive_text())
+                counters["stream_requests"] += 1
+                models = payload.get("models") or {}
+                data = base64.b64decode(payload.get("data", ""))
+
+                latency = (
+                    settings.latency_ms
+                    + settings.per_mb_ms * len(data) / (1024 * 1024)
+                    + rng.uniform(-settings.jitter_ms, settings.jitter_ms)
+                )
+                await asyncio.sleep(max(0.0, latency) / 1000)
+
+                if rng.random() < settings.drop_rate:
+                    counters["dropped"] += 1
+                    await websocket.close(code=1011)
+                    return
+                if rng.random() < settings.error_rate:
+                    counters["errors"] += 1
+                    reply = {"error": "Injected error from the Hume stand-in", "code": settings.error_code}
+                elif "prosody" in models and "face" in models and rng.random() < settings.no_audio_rate:
+                    counters["no_audio"] += 1
+                    reply = {
+                        "error": "Model 'prosody' is not supported for media type video_no_audio.",
+                        "code": "E0102",
+                    }
+                else:
+                    reply = await asyncio.to_thread(stream_response, settings, data, models)
+                if payload.get("payload_id") is not None:
+                    reply["payload_id"] = payload["payload_id"]
+                await websocket.send_text(json.dumps(reply))
+        except WebSocketDisconnect:
+            pass
+
+    @app.post("/v0/batch/jobs")
+    async def start_job(body: Dict[str, Any]):
+        job_id = str(uuid.uuid4())
+        now = int(time.time() * 1000)
+        jobs[job_id] = {
+            "request": body,
+            "created": now,
+            "ready_at": now + settings.batch_latency_ms,
+        }
+        counters["batch_jobs"] += 1
+        return {"job_id": job_id}
+
+    def _job(job_id: str) -> Dict[str, Any]:
+        job = jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job
+
+    @app.get("/v0/batch/jobs/{job_id}")
+    async def job_details(job_id: str):
+        job = _job(job_id)
+        now = int(time.time() * 1000)
+        urls: List[str] = job["request"].get("urls") or []
+        if now >= job["ready_at"]:
+            state = {
+                "status": "COMPLETED",
+                "created_timestamp_ms": job["created"],
+                "started_timestamp_ms": job["created"] + 100,
+                "ended_timestamp_ms": int(job["ready_at"]),
+                "num_predictions": len(urls),
+                "num_errors": 0,
+            }
+        else:
+            state = {
+                "status": "IN_PROGRESS",
+                "created_timestamp_ms": job["created"],
+                "started_timestamp_ms": job["created"] + 100,
+            }
+        return {
+            "job_id": job_id,
+            "type": "INFERENCE",
+            "request": {**job["request"], "files": []},
+            "state": state,
+        }
+
+    @app.get("/v0/batch/jobs/{job_id}/predictions")
+    async def job_predictions(job_id: str):
+        job = _job(job_id)
+        models = job["request"].get("models") or {}
+        return [_batch_predictions(settings, url, models, rng) for url in job["request"].get("urls") or []]
+
+    return app
+
+
+def parse_settings(argv: Optional[List[str]] = None, parser: Optional[argparse.ArgumentParser] = None):
+    """Settings from command-line flags (--latency-ms, --no-audio-rate, ...), plus host/port."""
+    parser = parser or argparse.ArgumentParser(description="Offline Hume stand-in.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    return args, settings_from_args(args)
+
+
+def add_arguments(parser: argparse.ArgumentParser, prefix: str = ""):
+    """Add one flag per FakeHumeSettings field (e.g. --latency-ms)."""
+    for name, default in FakeHumeSettings._field_defaults.items():
+        flag = f"--{prefix}{name.replace('_', '-')}"
+        parser.add_argument(flag, dest=f"{prefix.replace('-', '_')}{name}", type=type(default), default=default)
+
+
+def settings_from_args(args: argparse.Namespace, prefix: str = "") -> FakeHumeSettings:
+    return FakeHumeSettings(**{
+        name: getattr(args, f"{prefix.replace('-', '_')}{name}") for name in FakeHumeSettings._fields
+    })
+
+
+def main(argv: Optional[List[str]] = None):
+    import uvicorn
+
+    args, settings = parse_settings(argv)
+    print(f"[FakeHume] Listening on http://{args.host}:{args.port} ({settings})")
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
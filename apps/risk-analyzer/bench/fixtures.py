@@ -0,0 +1,250 @@
+"""
+Deterministic benchmark fixtures.
+
+Every generator takes a seed and writes the same bytes on every run (for a
+given numpy / OpenCV version), so timings from different runs and machines
+are comparable. Files are written once into the fixture directory and
+reused.
+"""
+
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import soundfile as sf
+
+# Hume's 48 expression dimensions (face and prosody share the set)
+EMOTIONS = (
+    "Admiration", "Adoration", "Aesthetic Appreciation", "Amusement", "Anger", "Anxiety",
+    "Awe", "Awkwardness", "Boredom", "Calmness", "Concentration", "Confusion",
+    "Contemplation", "Contempt", "Contentment", "Craving", "Desire", "Determination",
+    "Disappointment", "Disgust", "Distress", "Doubt", "Ecstasy", "Embarrassment",
+    "Empathic Pain", "Entrancement", "Envy", "Excitement", "Fear", "Guilt",
+    "Horror", "Interest", "Joy", "Love", "Nostalgia", "Pain",
+    "Pride", "Realization", "Relief", "Romance", "Sadness", "Satisfaction",
+    "Shame", "Surprise (negative)", "Surprise (positive)", "Sympathy", "Tiredness", "Triumph",
+)
+
+SAMPLE_RATE = 16000
+
+
+def sine_wav(path: str, seconds: float, freq_hz: float = 220.0, sample_rate: int = SAMPLE_RATE) -> str:
+    """Pure tone: the cheapest input Praat can get (no voicing changes)."""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    sf.write(path, 0.3 * np.sin(2 * np.pi * freq_hz * t), sample_rate, subtype="PCM_16")
+    return path
+
+
+def voiced_wav(path: str, seconds: float, seed: int = 0, sample_rate: int = SAMPLE_RATE) -> str:
+    """
+    Speech-like voiced signal.
+
+    A harmonic source with a drifting, vibrato-modulated f0 and per-cycle
+    jitter, shaped into ~4 syllables a second with pauses between phrases,
+    over a low noise floor. Enough structure for Praat's pitch, point
+    process, jitter/shimmer and HNR passes to do the work they do on real
+    speech.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sample_rate)
+    t = np.arange(n) / sample_rate
+
+    # Intonation: slow drift around 130 Hz, 5 Hz vibrato, small random jitter
+    f0 = 130 + 20 * np.sin(2 * np.pi * 0.15 * t) + 3 * np.sin(2 * np.pi * 5.0 * t)
+    f0 *= 1 + 0.01 * np.repeat(rng.standard_normal(n // 160 + 1), 160)[:n]
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+
+    source = np.zeros(n)
+    for k in range(1, 21):  # 1/k roll-off; the 20th harmonic stays well under Nyquist
+        source += np.sin(k * phase) / k
+    source /= np.max(np.abs(source)) or 1.0
+
+    syllables = 0.5 * (1 - np.cos(2 * np.pi * 4.0 * t))
+    phrases = (np.sin(2 * np.pi * t / 3.0) > -0.6).astype(float)  # ~1 s pause every 3 s
+    envelope = syllables * phrases
+
+    signal = 0.4 * source * envelope + 0.002 * rng.standard_normal(n)
+    sf.write(path, signal.astype(np.float32), sample_rate, subtype="PCM_16")
+    return path
+
+
+def _face_frame(width: int, height: int, t: float, blinking: bool) -> np.ndarray:
+    """One BGR frame of a drawn face that FaceMesh tracks."""
+    img = np.full((height, width, 3), (200, 190, 180), np.uint8)
+    s = min(width, height) / 360
+    # Gentle head sway so tracking has something to follow
+    cx = width // 2 + int(12 * s * np.sin(2 * np.pi * 0.3 * t))
+    cy = height // 2 + int(6 * s * np.sin(2 * np.pi * 0.2 * t))
+
+    def px(v: float) -> int:
+        return max(1, int(v * s))
+
+    cv2.ellipse(img, (cx, cy), (px(80), px(105)), 0, 0, 360, (140, 170, 215), -1)
+    cv2.ellipse(img, (cx, cy - px(60)), (px(85), px(55)), 0, 180, 360, (40, 50, 60), -1)
+    for dx in (-35, 35):
+        ex, ey = cx + int(dx * s), cy - px(15)
+        cv2.line(img, (ex - px(18), ey - px(18)), (ex + px(18), ey - px(20)), (40, 50, 60), px(4))
+        if blinking:
+            cv2.line(img, (ex - px(14), ey), (ex + px(14), ey), (60, 70, 90), px(2))
+        else:
+            cv2.ellipse(img, (ex, ey), (px(15), px(7)), 0, 0, 360, (245, 245, 245), -1)
+            cv2.circle(img, (ex, ey), px(6), (50, 40, 30), -1)
+    cv2.line(img, (cx, cy - px(5)), (cx - px(6), cy + px(25)), (110, 130, 170), px(3))
+    mouth_open = 8 + 4 * np.sin(2 * np.pi * 3.0 * t)
+    cv2.ellipse(img, (cx, cy + px(50)), (px(28), px(mouth_open)), 0, 0, 360, (90, 90, 170), -1)
+    return img
+
+
+def face_video(path: str, seconds: float, width: int, height: int, fps: float) -> str:
+    """
+    Rendered face video (mp4v): head sway, mouth movement, and a ~150 ms
+    blink every 3.5 s (about 17 blinks/min, the default baseline).
+    """
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"OpenCV could not open a video writer for {path}")
+    try:
+        for i in range(int(round(seconds * fps))):
+            t = i / fps
+            writer.write(_face_frame(width, height, t, blinking=(t % 3.5) < 0.15))
+    finally:
+        writer.release()
+    return path
+
+
+def resample_video(src: str, path: str, seconds: float, width: int, height: int, fps: float) -> str:
+    """
+    Re-render a recorded sample at a given size and frame rate (looping it
+    if it is shorter than `seconds`), for benchmarking on real faces.
+    """
+    cap = cv2.VideoCapture(src)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open sample video: {src}")
+    src_fps = cap.get(cv2.CAP_PROP_FPS) or fps
+    frames: List[np.ndarray] = []
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        raise ValueError(f"Sample video has no frames: {src}")
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    try:
+        for i in range(int(round(seconds * fps))):
+            frame = frames[int(i / fps * src_fps) % len(frames)]
+            writer.write(cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA))
+    finally:
+        writer.release()
+    return path
+
+
+def emotion_scores(rng: np.random.Generator, anchor: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+    """
+    One 48-dim emotion vector shaped like Hume's: mostly small scores with a
+    few dominant expressions, drifting around `anchor` if given.
+    """
+    if anchor is None:
+        anchor = rng.dirichlet(np.full(len(EMOTIONS), 0.3))
+    scores = np.clip(anchor + rng.normal(0, 0.02, len(EMOTIONS)), 0.0005, 1.0)
+    scores = 0.9 * scores / scores.max()
+    return [{"name": name, "score": round(float(score), 6)} for name, score in zip(EMOTIONS, scores)]
+
+
+def stream_predictions(
+    face_frames: int,
+    prosody_utterances: int = 0,
+    fps: float = 3.0,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    A Hume stream API response in its JSON wire shape (what send_file() parses).
+
+    Args:
+        face_frames: Face predictions (one per sampled frame)
+        prosody_utterances: Prosody predictions (0 = face only)
+        fps: Frame rate the face predictions are timestamped at
+        seed: RNG seed
+
+    Returns:
+        {"face": {"predictions": [...]}, "prosody": {"predictions": [...]}}
+    """
+    rng = np.random.default_rng(seed)
+    anchor = rng.dirichlet(np.full(len(EMOTIONS), 0.3))
+    response: Dict[str, Any] = {
+        "face": {
+            "predictions": [
+                {
+                    "frame": i,
+                    "time": round(i / fps, 3),
+                    "prob": round(float(rng.uniform(0.97, 1.0)), 6),
+                    "bbox": {"x": 220.0, "y": 90.0, "w": 200.0, "h": 230.0},
+                    "face_id": "face_0",
+                    "emotions": emotion_scores(rng, anchor),
+                }
+                for i in range(face_frames)
+            ]
+        }
+    }
+    if prosody_utterances:
+        length = face_frames / fps / prosody_utterances if face_frames else 2.0
+        response["prosody"] = {
+            "predictions": [
+                {
+                    "time": {"begin": round(i * length, 3), "end": round((i + 1) * length, 3)},
+                    "emotions": emotion_scores(rng, anchor),
+                }
+                for i in range(prosody_utterances)
+            ]
+        }
+    return response
+
+
+def consent_data(seed: int = 0) -> Dict[str, Any]:
+    """A /generate-consent-pdf request body with every field filled in."""
+    rng = np.random.default_rng(seed)
+    return {
+        "sessionId": f"bench-{seed}",
+        "claimId": f"CLM-{rng.integers(100000, 999999)}",
+        "claimant": {
+            "name": "Nur Aisyah binti Abdullah",
+            "nric": "900101-14-5678",
+            "phone": "+60 12-345 6789",
+            "email": "aisyah@example.com",
+        },
+        "claim": {
+            "policyNumber": "POL-2026-000123",
+            "claimNumber": "CLM-2026-004567",
+            "vehiclePlate": "WXY 1234",
+            "vehicleYear": "2021",
+            "vehicleMake": "Perodua",
+            "vehicleModel": "Myvi 1.5 AV",
+            "engineNumber": "1NR-F123456",
+            "chassisNumber": "PM2M602S001234567",
+            "incidentDate": "2026-09-30T08:15:00Z",
+            "location": "Jalan Tun Razak, Kuala Lumpur",
+        },
+        "analysis": {},
+        "adjuster": {"name": "Lee Wei Ming", "company": "Bench Adjusters Sdn Bhd"},
+    }
+
+
+def ensure(fixture_dir: str, name: str, build, *args: Any) -> str:
+    """Path of a fixture file, generating it with build(path, *args) if missing."""
+    os.makedirs(fixture_dir, exist_ok=True)
+    path = os.path.join(fixture_dir, name)
+    if not os.path.exists(path):
+        tmp = f"{path}.part{os.path.splitext(name)[1]}"
+        build(tmp, *args)
+        os.replace(tmp, path)
+    return path
+
+
+VIDEO_SIZES: Tuple[Tuple[str, int, int], ...] = (
+    ("360p", 640, 360),
+    ("720p", 1280, 720),
+    ("1080p", 1920, 1080),
+)
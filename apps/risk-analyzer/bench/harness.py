@@ -0,0 +1,232 @@
+"""
+Benchmark runner.
+
+Each case runs in a fresh spawned process, the way analyzer pool workers
+run, so peak RSS is that case's alone and one case's warm caches don't
+flatter the next. Results are plain dicts written to JSON and compared
+against a stored baseline of the same shape.
+"""
+
+import contextlib
+import importlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class Case(NamedTuple):
+    """
+    One benchmark case.
+
+    setup is "module:function"; it is called in the worker with params and
+    returns (callable, args). Only the callable is timed, number times per
+    sample, repeat samples after warmup.
+    """
+    name: str
+    setup: str
+    params: Dict[str, Any]
+    repeat: int = 5
+    number: int = 1
+    warmup: int = 1
+    media_seconds: float = 0.0  # seconds of audio/video per call, for x-realtime
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Linear-interpolated percentile (q in 0..100) of a non-empty list."""
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def _run_case(case: Case) -> Dict[str, Any]:
+    """Worker side: set up, warm up, time; returns raw samples."""
+    from app import timing
+
+    module_name, func_name = case.setup.split(":")
+    fn, args = getattr(importlib.import_module(module_name), func_name)(**case.params)
+    rss_before = _peak_rss_mb()
+
+    samples: List[float] = []
+    stages: Dict[str, float] = {}
+    # Analyzers log per call; keep that out of the terminal (but not out of the timing)
+    with contextlib.redirect_stdout(io.StringIO()) as sink:
+        for _ in range(case.warmup):
+            fn(*args)
+            sink.seek(0)
+            sink.truncate()
+        for _ in range(case.repeat):
+            with timing.collect() as call_stages:
+                start = time.perf_counter()
+                for _ in range(case.number):
+                    fn(*args)
+                samples.append((time.perf_counter() - start) / case.number)
+            for name, seconds in call_stages.items():
+                stages[name] = stages.get(name, 0.0) + seconds / case.number
+            sink.seek(0)
+            sink.truncate()
+
+    return {
+        "samples": samples,
+        "stages": {name: seconds / case.repeat for name, seconds in stages.items()},
+        "rss_before_mb": rss_before,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def summarize(case: Case, raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Latency percentiles (ms), throughput and memory for one case."""
+    samples = raw["samples"]
+    total = sum(samples)
+    result: Dict[str, Any] = {
+        "params": case.params,
+        "calls": len(samples) * case.number,
+        "latency_ms": {
+            "mean": round(total / len(samples) * 1000, 3),
+            "min": round(min(samples) * 1000, 3),
+            "p50": round(percentile(samples, 50) * 1000, 3),
+            "p90": round(percentile(samples, 90) * 1000, 3),
+            "p99": round(percentile(samples, 99) * 1000, 3),
+            "max": round(max(samples) * 1000, 3),
+        },
+        "throughput_per_s": round(len(samples) / total, 3) if total else None,
+        "peak_rss_mb": raw["peak_rss_mb"],
+        "rss_growth_mb": (
+            round(raw["peak_rss_mb"] - raw["rss_before_mb"], 1)
+            if raw["peak_rss_mb"] is not None and raw["rss_before_mb"] is not None else None
+        ),
+    }
+    if case.media_seconds and total:
+        result["x_realtime"] = round(case.media_seconds * len(samples) / total, 2)
+    if raw["stages"]:
+        result["stages_ms"] = {
+            name: round(seconds * 1000, 3)
+            for name, seconds in sorted(raw["stages"].items(), key=lambda item: -item[1])
+        }
+    return result
+
+
+def run_cases(cases: List[Case], log=print) -> Dict[str, Any]:
+    """Run every case (each in its own process) and return the results document."""
+    results: Dict[str, Any] = {}
+    ctx = multiprocessing.get_context("spawn")
+    for case in cases:
+        log(f"[bench] {case.name} ...")
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as executor:
+            raw = executor.submit(_run_case, case).result()
+        results[case.name] = summarize(case, raw)
+        lat = results[case.name]["latency_ms"]
+        log(
+            f"[bench] {case.name}: p50 {lat['p50']:.3f} ms, p99 {lat['p99']:.3f} ms, "
+            f"peak RSS {results[case.name]['peak_rss_mb']} MB"
+        )
+    return {"meta": environment(), "results": results}
+
+
+def environment() -> Dict[str, Any]:
+    """Where the numbers came from; compare baselines from like machines only."""
+    versions = {}
+    for module in ("numpy", "cv2", "mediapipe", "parselmouth", "fpdf"):
+        try:
+            versions[module] = getattr(importlib.import_module(module), "__version__", "?")
+        except ImportError:
+            versions[module] = None
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "versions": versions,
+    }
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float,
+    rss_tolerance: float,
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Compare a results document with a baseline.
+
+    A case regresses if its p50 latency grew by more than `tolerance` or its
+    peak RSS by more than `rss_tolerance` (fractions, e.g. 0.25 = +25%).
+
+    Returns:
+        Tuple of (one row per case present in both, names of regressed cases)
+    """
+    rows = []
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        p50, base_p50 = result["latency_ms"]["p50"], base["latency_ms"]["p50"]
+        rss, base_rss = result.get("peak_rss_mb"), base.get("peak_rss_mb")
+        latency_ratio = p50 / base_p50 if base_p50 else None
+        rss_ratio = rss / base_rss if rss and base_rss else None
+        regressed = (
+            (latency_ratio is not None and latency_ratio > 1 + tolerance)
+            or (rss_ratio is not None and rss_ratio > 1 + rss_tolerance)
+        )
+        rows.append({
+            "case": name,
+            "p50_ms": p50,
+            "baseline_p50_ms": base_p50,
+            "latency_ratio": round(latency_ratio, 3) if latency_ratio is not None else None,
+            "peak_rss_mb": rss,
+            "baseline_peak_rss_mb": base_rss,
+            "rss_ratio": round(rss_ratio, 3) if rss_ratio is not None else None,
+            "regressed": regressed,
+        })
+        if regressed:
+            regressions.append(name)
+    return rows, regressions
+
+
+def format_comparison(rows: List[Dict[str, Any]]) -> str:
+    """Fixed-width table of compare() rows."""
+    lines = [f"{'case':<40} {'p50 ms':>10} {'base ms':>10} {'ratio':>7} {'RSS MB':>8} {'base MB':>8}"]
+    for row in rows:
+        lines.append(
+            f"{row['case']:<40} {row['p50_ms']:>10.2f} {row['baseline_p50_ms']:>10.2f} "
+            f"{row['latency_ratio'] or 0:>7.2f} {row['peak_rss_mb'] or 0:>8.1f} "
+            f"{row['baseline_peak_rss_mb'] or 0:>8.1f}  {'REGRESSED' if row['regressed'] else ''}"
+        )
+    return "\n".join(lines)
+
+
+def load_json(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_json(path: str, document: Dict[str, Any]):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2)
+        f.write("\n")
@@ -0,0 +1,214 @@
+"""
+Closed-loop HTTP load helpers shared by the load benchmarks.
+
+A fixed number of workers each send one request, wait for the answer and
+send the next, until the request budget is spent; throughput at a given
+concurrency is then completed requests over wall time.
+"""
+
+import asyncio
+import os
+import re
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import httpx
+
+from bench.harness import percentile
+
+STAGE_METRIC = "risk_analyzer_stage_duration_seconds"
+_LABEL = re.compile(r'(\w+)="([^"]*)"')
+
+
+class RequestResult(NamedTuple):
+    """One request as the client saw it."""
+    status: int  # 0 = transport error (no HTTP response)
+    latency_s: float
+    stages_ms: Dict[str, float] = {}  # the response's profile breakdown (profile=true only)
+    server_ms: Optional[float] = None  # the response's profile total (profile=true only)
+    empty: bool = False  # 200 but no emotions / metrics in it
+    error: str = ""
+
+
+def unique_body(media: bytes, i: int) -> bytes:
+    """
+    The file with a per-request trailer after its last box / chunk, so
+    concurrent uploads don't share one computation through the in-flight
+    dedup (and the Hume stand-in seeds each differently). Demuxers and
+    Praat ignore the trailer.
+    """
+    return media + f"bench-{os.getpid()}-{i}".encode().ljust(32, b"\0")
+
+
+async def post_file(
+    client: httpx.AsyncClient,
+    path: str,
+    params: Dict[str, str],
+    file: Tuple[str, bytes, str],
+    is_empty: Callable[[Dict[str, Any]], bool] = lambda metrics: not metrics,
+    profile: bool = False,
+) -> RequestResult:
+    """
+    POST one upload, as production callers do.
+
+    Args:
+        client: Client with the app's base URL
+        path: Endpoint path
+        params: Query parameters
+        file: (filename, body, content type)
+        is_empty: Whether a 200 response's metrics count as an empty result
+        profile: Add profile=true and read the stage breakdown back (the
+            server then does extra timing work, so numbers drift from production)
+    """
+    if profile:
+        params = {**params, "profile": "true"}
+    started = time.perf_counter()
+    try:
+        response = await client.post(path, params=params, files={"file": file})
+    except httpx.HTTPError as e:
+        return RequestResult(0, time.perf_counter() - started, error=type(e).__name__)
+    latency = time.perf_counter() - started
+
+    if response.status_code != 200:
+        detail = response.json().get("detail", "") if response.headers.get("content-type") == "application/json" else ""
+        return RequestResult(response.status_code, latency, error=f"{response.status_code} {str(detail)[:120]}")
+    metrics = response.json().get("metrics") or {}
+    server_profile = metrics.pop("profile", None) or {}
+    return RequestResult(
+        200, latency,
+        stages_ms=server_profile.get("stages_ms") or {},
+        server_ms=server_profile.get("total_ms"),
+        empty=is_empty(metrics),
+    )
+
+
+async def run_closed_loop(
+    send: Callable[[int], Awaitable[RequestResult]],
+    requests: int,
+    concurrency: int,
+) -> Dict[str, Any]:
+    """
+    Send `requests` requests from `concurrency` workers.
+
+    Args:
+        send: Coroutine function sending request number i
+        requests: Total requests
+        concurrency: Requests in flight at once
+
+    Returns:
+        {"wall_s": ..., "results": [RequestResult, ...]}
+    """
+    counter = iter(range(requests))
+    results: List[RequestResult] = []
+
+    async def worker():
+        for i in counter:
+            results.append(await send(i))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return {"wall_s": time.perf_counter() - started, "results": results}
+
+
+def latency_summary(values_s: List[float]) -> Optional[Dict[str, float]]:
+    """p50/p90/p99/max (ms) of a list of seconds."""
+    if not values_s:
+        return None
+    return {
+        "mean": round(sum(values_s) / len(values_s) * 1000, 1),
+        "p50": round(percentile(values_s, 50) * 1000, 1),
+        "p90": round(percentile(values_s, 90) * 1000, 1),
+        "p99": round(percentile(values_s, 99) * 1000, 1),
+        "max": round(max(values_s) * 1000, 1),
+    }
+
+
+def summarize_requests(results: List[RequestResult], wall_s: float) -> Dict[str, Any]:
+    """Throughput, latency percentiles, error rates and mean per-stage times."""
+    ok = [r for r in results if r.status == 200]
+    statuses = Counter(str(r.status) for r in results)
+    stages: Dict[str, float] = {}
+    for r in ok:
+        for name, ms in r.stages_ms.items():
+            stages[name] = stages.get(name, 0.0) + ms
+    errors = Counter(r.error for r in results if r.error)
+    return {
+        "requests": len(results),
+        "ok": len(ok),
+        "wall_s": round(wall_s, 2),
+        "throughput_rps": round(len(ok) / wall_s, 2) if wall_s else None,
+        "error_rate": round(1 - len(ok) / len(results), 4) if results else None,
+        "empty_rate": round(sum(r.empty for r in ok) / len(ok), 4) if ok else None,
+        "statuses": dict(sorted(statuses.items())),
+        "errors": dict(errors.most_common(5)),
+        "latency_ms": latency_summary([r.latency_s for r in ok]),
+        "stages_ms": {
+            name: round(total / len(ok), 1)
+            for name, total in sorted(stages.items(), key=lambda item: -item[1])
+        },
+    }
+
+
+async def stage_histograms(client: httpx.AsyncClient) -> Dict[str, Dict[str, Any]]:
+    """
+    The app's per-stage latency histograms, read from GET /metrics.
+
+    These are fed by every request, profiled or not, so diffing two
+    snapshots gives the stage times of the requests sent in between.
+
+    Returns:
+        {stage: {"buckets": {upper bound (s): cumulative count}, "sum": seconds}}
+    """
+    response = await client.get("/metrics")
+    response.raise_for_status()
+    stages: Dict[str, Dict[str, Any]] = {}
+    for line in response.text.splitlines():
+        if not line.startswith(STAGE_METRIC):
+            continue
+        sample, value = line.rsplit(" ", 1)
+        labels = dict(_LABEL.findall(sample))
+        histogram = stages.setdefault(labels.get("stage", ""), {"buckets": {}, "sum": 0.0})
+        if sample.startswith(f"{STAGE_METRIC}_bucket"):
+            histogram["buckets"][float(labels["le"])] = int(float(value))
+        elif sample.startswith(f"{STAGE_METRIC}_sum"):
+            histogram["sum"] = float(value)
+    return stages
+
+
+def stage_summary(
+    before: Dict[str, Dict[str, Any]], after: Dict[str, Dict[str, Any]], stage: str,
+) -> Optional[Dict[str, float]]:
+    """
+    Count, mean and p50/p90/p99 (ms) of a stage's observations between two
+    stage_histograms() snapshots. Percentiles are interpolated within
+    buckets, as Prometheus's histogram_quantile() does.
+    """
+    new = after.get(stage)
+    if new is None:
+        return None
+    old = before.get(stage, {"buckets": {}, "sum": 0.0})
+    bounds = sorted(new["buckets"])
+    counts = [new["buckets"][b] - old["buckets"].get(b, 0) for b in bounds]
+    total = counts[-1] if counts else 0
+    if not total:
+        return None
+
+    def quantile(q: float) -> float:
+        target = q * total
+        lower, below = 0.0, 0
+        for bound, cumulative in zip(bounds, counts):
+            if cumulative >= target:
+                if bound == float("inf"):
+                    return lower
+                return lower + (bound - lower) * (target - below) / (cumulative - below)
+            lower, below = bound, cumulative
+        return lower
+
+    return {
+        "count": total,
+        "mean": round((new["sum"] - old["sum"]) / total * 1000, 1),
+        "p50": round(quantile(0.50) * 1000, 1),
+        "p90": round(quantile(0.90) * 1000, 1),
+        "p99": round(quantile(0.99) * 1000, 1),
+    }
@@ -0,0 +1,328 @@
+"""
+Segment load test: replays the video-service fan-out.
+
+video-service's processVideo() cuts a recording into 5 s segments and keeps
+up to 5 of them in flight (extractAndAnalyzeSegment); each segment is three
+simultaneous POSTs (analyzeAndStoreSegment):
+
+    /analyze-audio        segment.wav (PCM 16-bit, 44.1 kHz mono; skipped without audio)
+    /analyze-video        segment.mp4 (480 px wide, 15 fps)
+    /analyze-expression   segment.mp4 (same bytes, noAudio=<no audio>)
+
+and a segment fails if any of the three does (no retries, as in
+production). This runs that pattern for many recordings at once against the
+app with the Hume stand-in, at each level of recordings in flight, and
+reports segment throughput, tail latency and error rates per level and
+where throughput stops growing.
+
+    python -m bench.segments --concurrency 1,2,4,8
+    python -m bench.segments --concurrency 4,8 --workers 8 --pool-size 8
+    python -m bench.segments --recording-seconds 120 --no-audio-rate 0.2 --hume-latency-ms 1500
+    python -m bench.segments --app-url http://127.0.0.1:3305   # an app already running
+    python -m bench.segments --concurrency 4 --profile         # + per-endpoint stage breakdowns
+
+Requests go out exactly as video-service sends them; only --profile adds
+profile=true (and the server-side timing work that comes with it), so
+per-endpoint stages_ms is empty in a plain run.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from bench import fixtures, servers
+from bench.fake_hume import add_arguments, settings_from_args
+from bench.harness import environment, write_json
+from bench.load import RequestResult, latency_summary, post_file, summarize_requests, unique_body
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FIXTURES = os.path.join(BENCH_DIR, ".fixtures")
+DEFAULT_OUT = os.path.join(BENCH_DIR, "results", "segments.json")
+
+# video-service's segment extraction: scale=480:-2,fps=15 and -ar 44100 -ac 1
+SEGMENT_WIDTH, SEGMENT_HEIGHT, SEGMENT_FPS = 480, 270, 15
+SEGMENT_SAMPLE_RATE = 44100
+# video-service's CONCURRENCY_LIMIT in processVideo()
+SEGMENTS_IN_FLIGHT = 5
+
+ENDPOINTS = ("audio", "video", "expression", "pdf")
+
+
+class SegmentLoad:
+    """One level's run: recordings, their segments and every request's result."""
+
+    def __init__(self, args, video: bytes, audio: bytes):
+        self.args = args
+        self.video = video
+        self.audio = audio
+        self.requests: Dict[str, List[RequestResult]] = {name: [] for name in ENDPOINTS}
+        self.segment_latencies: List[float] = []
+        self.recording_latencies: List[float] = []
+        self.segments_ok = 0
+        self.segments_failed = 0
+        self.failures: Counter = Counter()
+        self._n = 0
+
+    def _body(self, media: bytes) -> bytes:
+        self._n += 1
+        return unique_body(media, self._n)
+
+    async def segment(self, client: httpx.AsyncClient, recording: str, index: int, no_audio: bool):
+        """analyzeAndStoreSegment(): the three POSTs at once."""
+        session = {"sessionId": f"{recording}-{index}"}
+        video = self._body(self.video)
+        calls = {
+            "video": post_file(
+                client, "/analyze-video", session, ("segment.mp4", video, "video/mp4"),
+                profile=self.args.profile,
+            ),
+            "expression": post_file(
+                client, "/analyze-expression", {**session, "noAudio": str(no_audio).lower()},
+                ("segment.mp4", video, "video/mp4"),
+                is_empty=lambda metrics: not metrics.get("emotion_count"),
+                profile=self.args.profile,
+            ),
+        }
+        if not no_audio:
+            calls["audio"] = post_file(
+                client, "/analyze-audio", session, ("segment.wav", self._body(self.audio), "audio/wav"),
+                profile=self.args.profile,
+            )
+
+        started = time.perf_counter()
+        results = dict(zip(calls, await asyncio.gather(*calls.values())))
+        for name, result in results.items():
+            self.requests[name].append(result)
+        failed = [f"{name}: {r.error}" for name, r in results.items() if r.status != 200]
+        if failed:
+            self.segments_failed += 1
+            self.failures.update(failed)
+        else:
+            self.segments_ok += 1
+            self.segment_latencies.append(time.perf_counter() - started)
+
+    async def recording(self, client: httpx.AsyncClient, number: int, no_audio: bool):
+        """processVideo(): every segment, SEGMENTS_IN_FLIGHT at a time, then the consent PDF."""
+        name = f"bench-rec-{number}"
+        segments = math.ceil(self.args.recording_seconds / self.args.segment_seconds)
+        gate = asyncio.Semaphore(SEGMENTS_IN_FLIGHT)
+
+        async def run(index: int):
+            async with gate:
+                await self.segment(client, name, index, no_audio)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(run(i) for i in range(segments)))
+        if self.args.consent_pdf:
+            self.requests["pdf"].append(await _consent_pdf(client, name, number))
+        self.recording_latencies.append(time.perf_counter() - started)
+
+    def summary(self, wall_s: float) -> Dict[str, Any]:
+        segments = self.segments_ok + self.segments_failed
+        every = [r for results in self.requests.values() for r in results]
+        return {
+            "recordings": len(self.recording_latencies),
+            "segments": segments,
+            "segments_ok": self.segments_ok,
+            "wall_s": round(wall_s, 2),
+            "segments_per_s": round(self.segments_ok / wall_s, 3) if wall_s else None,
+            # Seconds of recording analysed per second of wall time
+            "x_realtime": round(self.segments_ok * self.args.segment_seconds / wall_s, 2) if wall_s else None,
+            "segment_error_rate": round(self.segments_failed / segments, 4) if segments else None,
+            "request_error_rate": round(sum(r.status != 200 for r in every) / len(every), 4) if every else None,
+            "rejected_429": sum(r.status == 429 for r in every),
+            "server_errors_5xx": sum(r.status >= 500 for r in every),
+            "transport_errors": sum(r.status == 0 for r in every),
+            "segment_latency_ms": latency_summary(self.segment_latencies),
+            "recording_latency_ms": latency_summary(self.recording_latencies),
+            "failures": dict(self.failures.most_common(5)),
+            "endpoints": {
+                name: summarize_requests(results, wall_s) for name, results in self.requests.items() if results
+            },
+        }
+
+
+async def _consent_pdf(client: httpx.AsyncClient, recording: str, number: int) -> RequestResult:
+    body = fixtures.consent_data(seed=number)
+    body["sessionId"] = recording
+    started = time.perf_counter()
+    try:
+        response = await client.post("/generate-consent-pdf", json=body)
+    except httpx.HTTPError as e:
+        return RequestResult(0, time.perf_counter() - started, error=type(e).__name__)
+    latency = time.perf_counter() - started
+    if response.status_code != 200:
+        return RequestResult(response.status_code, latency, error=f"{response.status_code} {response.text[:120]}")
+    return RequestResult(200, latency)
+
+
+async def run_level(args, app_url: str, video: bytes, audio: bytes, concurrency: int) -> Dict[str, Any]:
+    """`concurrency` recordings in flight until args.recordings (default 2 x concurrency) are done."""
+    load = SegmentLoad(args, video, audio)
+    total = args.recordings or 2 * concurrency
+    rng = random.Random(args.seed)
+    no_audio = [rng.random() < args.no_audio_rate for _ in range(total)]
+    numbers = iter(range(total))
+
+    # Enough connections that the client never queues: 3 per segment in flight
+    connections = concurrency * SEGMENTS_IN_FLIGHT * 3 + 4
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=app_url, timeout=args.timeout, limits=limits) as client:
+        async def worker():
+            for number in numbers:
+                await load.recording(client, number, no_audio[number])
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - started
+        admission = (await client.get("/stats")).json().get("admission", {})
+
+    summary = load.summary(wall)
+    # Per-request admission waits are in each endpoint's stages_ms; these are the limits behind them
+    summary["admission_limits"] = {name: s.get("max_concurrent") for name, s in admission.items()}
+    return summary
+
+
+def saturation(results: Dict[str, Dict[str, Any]], knee: float = 0.9) -> Optional[Dict[str, Any]]:
+    """
+    Peak segment throughput across levels, and the knee: the fewest
+    recordings in flight that reach `knee` of the peak. Past the knee more
+    concurrency mostly buys queueing (watch segment p99).
+    """
+    rates = {int(level): r["segments_per_s"] or 0.0 for level, r in results.items()}
+    if not rates:
+        return None
+    peak_level = max(rates, key=rates.get)
+    knee_level = min(level for level, rate in rates.items() if rate >= knee * rates[peak_level])
+    return {
+        "peak_level": peak_level,
+        "peak_segments_per_s": rates[peak_level],
+        "peak_x_realtime": results[str(peak_level)]["x_realtime"],
+        "knee_level": knee_level,
+        "knee_segments_per_s": rates[knee_level],
+        "knee_segment_p99_ms": (results[str(knee_level)]["segment_latency_ms"] or {}).get("p99"),
+    }
+
+
+def format_levels(results: Dict[str, Dict[str, Any]]) -> str:
+    lines = [
+        f"{'recordings':>10} {'seg/s':>7} {'x-rt':>6} {'seg p50':>9} {'seg p99':>9} "
+        f"{'seg err':>8} {'429':>5} {'5xx':>5} {'audio p99':>10} {'video p99':>10} {'expr p99':>9}"
+    ]
+    for level, r in results.items():
+        seg = r["segment_latency_ms"] or {}
+
+        def p99(name: str) -> float:
+            endpoint = r["endpoints"].get(name) or {}
+            return (endpoint.get("latency_ms") or {}).get("p99", 0.0)
+
+        lines.append(
+            f"{level:>10} {r['segments_per_s'] or 0:>7.2f} {r['x_realtime'] or 0:>6.1f} "
+            f"{seg.get('p50', 0):>9.1f} {seg.get('p99', 0):>9.1f} {r['segment_error_rate'] or 0:>8.1%} "
+            f"{r['rejected_429']:>5} {r['server_errors_5xx']:>5} "
+            f"{p99('audio'):>10.1f} {p99('video'):>10.1f} {p99('expression'):>9.1f}"
+        )
+    return "\n".join(lines)
+
+
+async def run_levels(args, app_url: str, video: bytes, audio: bytes) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    for concurrency in args.concurrency:
+        print(f"[bench] segments: {args.recordings or 2 * concurrency} recordings, {concurrency} in flight ...")
+        results[str(concurrency)] = await run_level(args, app_url, video, audio, concurrency)
+    return results
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay video-service segment fan-out against the app.")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="Comma-separated recordings-in-flight levels")
+    parser.add_argument("--recordings", type=int, default=0, help="Recordings per level (default 2 x concurrency)")
+    parser.add_argument("--recording-seconds", type=float, default=30.0, help="Length of each recording")
+    parser.add_argument("--segment-seconds", type=float, default=5.0, help="Segment length (video-service uses 5)")
+    parser.add_argument("--no-audio-rate", type=float, default=0.0, help="Fraction of recordings without audio")
+    parser.add_argument(
+        "--consent-pdf", action="store_true",
+        help="Also generate the consent PDF after each recording (written to the app's local storage/)",
+    )
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="Send profile=true for per-endpoint stage breakdowns (numbers drift from production)",
+    )
+    parser.add_argument("--timeout", type=float, default=600.0, help="Per-request timeout (s)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for which recordings have no audio")
+    parser.add_argument("--workers", type=int, help="ANALYZER_POOL_WORKERS for the app")
+    parser.add_argument("--pool-size", type=int, help="HUME_STREAM_POOL_SIZE for the app")
+    parser.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE", help="Extra app setting")
+    parser.add_argument("--app-url", help="Load an app that is already running (ignores --hume-*)")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="Fixture directory")
+    parser.add_argument("--out", default=DEFAULT_OUT, help="Results JSON")
+    add_arguments(parser, prefix="hume-")
+    args = parser.parse_args(argv)
+    args.concurrency = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+    seconds = args.segment_seconds
+    video_path = fixtures.ensure(
+        args.fixtures, f"segment-{SEGMENT_WIDTH}-{SEGMENT_FPS}fps-{seconds:g}s.mp4",
+        fixtures.face_video, seconds, SEGMENT_WIDTH, SEGMENT_HEIGHT, SEGMENT_FPS,
+    )
+    audio_path = fixtures.ensure(
+        args.fixtures, f"segment-voiced-{SEGMENT_SAMPLE_RATE}-{seconds:g}s.wav",
+        fixtures.voiced_wav, seconds, 0, SEGMENT_SAMPLE_RATE,
+    )
+    with open(video_path, "rb") as f:
+        video = f.read()
+    with open(audio_path, "rb") as f:
+        audio = f.read()
+
+    settings = settings_from_args(args, prefix="hume-")
+    app_env = dict(item.split("=", 1) for item in args.app_env)
+    if args.workers:
+        app_env["ANALYZER_POOL_WORKERS"] = str(args.workers)
+    if args.pool_size:
+        app_env["HUME_STREAM_POOL_SIZE"] = str(args.pool_size)
+
+    with contextlib.ExitStack() as stack:
+        app_url = args.app_url
+        if app_url is None:
+            hume_url = stack.enter_context(servers.fake_hume(settings))
+            app_url = stack.enter_context(servers.analyzer_app(hume_url, app_env))
+        results = asyncio.run(run_levels(args, app_url, video, audio))
+
+    meta = environment()
+    meta.update({
+        "recording_seconds": args.recording_seconds,
+        "segment_seconds": args.segment_seconds,
+        "segments_per_recording": math.ceil(args.recording_seconds / args.segment_seconds),
+        "no_audio_rate": args.no_audio_rate,
+        "consent_pdf": args.consent_pdf,
+        "profile": args.profile,
+        "app_url": args.app_url,
+        "app_env": app_env,
+        "hume": None if args.app_url else settings._asdict(),
+    })
+    document = {"meta": meta, "results": results, "saturation": saturation(results)}
+    write_json(args.out, document)
+
+    print(format_levels(results))
+    sat = document["saturation"]
+    if sat:
+        print(
+            f"[bench] Peak {sat['peak_segments_per_s']:.2f} segments/s ({sat['peak_x_realtime']}x realtime) "
+            f"at {sat['peak_level']} recordings in flight; 90% of it at {sat['knee_level']} "
+            f"(segment p99 {sat['knee_segment_p99_ms']} ms)"
+        )
+    print(f"[bench] Wrote {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Local servers for the load benchmarks.
+
+Starts the Hume stand-in (bench.fake_hume) and the analyzer app (uvicorn) as
+subprocesses on free ports, waits for their /health, and stops them on
+exit. Server output goes to log files next to the results, not the terminal.
+"""
+
+import contextlib
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+
+from bench.fake_hume import FakeHumeSettings
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOG_DIR = os.path.join(APP_DIR, "bench", "results", "logs")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_healthy(url: str, timeout: float = 60.0, process: Optional[subprocess.Popen] = None):
+    """Poll url/health until it answers 200 (or the process dies / time runs out)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Server for {url} exited with status {process.returncode}")
+        try:
+            if httpx.get(f"{url}/health", timeout=2.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise TimeoutError(f"{url} not healthy after {timeout:.0f}s")
+
+
+@contextlib.contextmanager
+def _process(name: str, args: List[str], env: Dict[str, str], url: str, timeout: float) -> Iterator[str]:
+    os.makedirs(LOG_DIR, exist_ok=True)
+    log_path = os.path.join(LOG_DIR, f"{name}.log")
+    with open(log_path, "w") as log:
+        process = subprocess.Popen(args, cwd=APP_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+        try:
+            wait_healthy(url, timeout, process)
+            print(f"[bench] {name} up at {url} (log: {log_path})")
+            yield url
+        finally:
+            if process.poll() is None:
+                process.send_signal(signal.SIGINT)
+                try:
+                    process.wait(timeout=15)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+
+
+@contextlib.contextmanager
+def fake_hume(settings: FakeHumeSettings) -> Iterator[str]:
+    """Run the Hume stand-in; yields its base URL."""
+    port = free_port()
+    args = [sys.executable, "-m", "bench.fake_hume", "--port", str(port)]
+    for name, value in settings._asdict().items():
+        args += [f"--{name.replace('_', '-')}", str(value)]
+    with _process("fake_hume", args, dict(os.environ), f"http://127.0.0.1:{port}", timeout=30.0) as url:
+        yield url
+
+
+@contextlib.contextmanager
+def analyzer_app(hume_url: str, env: Optional[Dict[str, str]] = None) -> Iterator[str]:
+    """
+    Run the analyzer app against the stand-in; yields its base URL.
+
+    Args:
+        hume_url: Base URL of the Hume stand-in
+        env: Extra settings for the app (e.g. HUME_STREAM_POOL_SIZE)
+    """
+    port = free_port()
+    app_env = {
+        **os.environ,
+        "HUME_API_KEY": "offline-bench",
+        "HUME_BASE_URL": hume_url,
+        # Every request should do the work, not hit the cache
+        "RESULT_CACHE_ENABLED": "false",
+        # Local storage/ instead of a real bucket (consent PDFs)
+        "SUPABASE_URL": "",
+        **(env or {}),
+    }
+    args = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning",
+    ]
+    with _process("app", args, app_env, f"http://127.0.0.1:{port}", timeout=120.0) as url:
+        yield url